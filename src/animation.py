@@ -1,19 +1,98 @@
+import pygame
+
+from assets import ASSETS
+
+
+class FacingFrames:
+    # Frame quay phải + bản lật sẵn quay trái, chọn theo hướng mà không tạo Surface mới
+    def __init__(self, right, left=None):
+        self.right = right
+        self.left = left if left is not None else [pygame.transform.flip(f, True, False) for f in right]
+
+    def __len__(self):
+        return len(self.right)
+
+    def get(self, index, facing_right=True):
+        return (self.right if facing_right else self.left)[index]
+
+    def surfaces(self):
+        # Mỗi Surface một lần (clip không lật thì right và left là cùng một list)
+        return list({id(f): f for f in (*self.right, *self.left)}.values())
+
+
+class Clip:
+    # Dữ liệu frame dùng chung cho mọi entity; tốc độ tính theo frame/giây chứ không theo số lần update
+    def __init__(self, frames, fps, loop=True):
+        self.frames = frames if isinstance(frames, FacingFrames) else FacingFrames(frames)
+        self.fps = fps
+        self.loop = loop
+
+    def __len__(self):
+        return len(self.frames)
+
+    def index_at(self, elapsed_ms):
+        i = int(elapsed_ms * self.fps) // 1000
+        return i % len(self.frames) if self.loop else min(i, len(self.frames) - 1)
+
+    def done_at(self, elapsed_ms):
+        return not self.loop and int(elapsed_ms * self.fps) // 1000 >= len(self.frames)
+
+    def image(self, elapsed_ms, facing_right=True):
+        return self.frames.get(self.index_at(elapsed_ms), facing_right)
+
+    def surfaces(self):
+        return self.frames.surfaces()
+
+
+def get_clip(key, build):
+    # Mỗi clip dựng một lần, vd. ("player", "nhanvat1", "run"), và nằm trong ASSETS như mọi ảnh khác:
+    # tính vào ngân sách byte (mọi frame nó giữ, kể cả bản lật) và bị bỏ theo LRU như ảnh.
+    # build() có thể trả None (thiếu ảnh); kết quả đó cũng được nhớ
+    return ASSETS.cached(("clip", key), build)
+
+
+class Cursor:
+    # Trạng thái phát của một entity: clip đang phát + mốc bắt đầu (ms theo đồng hồ của entity)
+    __slots__ = ("clip", "start")
+
+    def __init__(self, clip=None, start=0):
+        self.clip = clip
+        self.start = start
+
+    def play(self, clip, now):
+        if clip is not self.clip:
+            self.clip, self.start = clip, now
+
+    def index(self, now):
+        return self.clip.index_at(now - self.start)
+
+    def image(self, now, facing_right=True):
+        return self.clip.image(now - self.start, facing_right)
+
+
 class Animation:
-    def __init__(self, frames, loop=True):
-        self.frames = frames
+    # Cursor tự giữ đồng hồ (mặc định thời gian thật) cho character.Player
+    def __init__(self, clip, clock=None):
+        self.clip = clip
+        self.clock = clock or pygame.time.get_ticks
+        self.start = self.clock()
+        self.current = 0
+        self.done = False
+
+    @property
+    def frames(self):
+        return self.clip.frames.right
+
+    def reset(self):
+        self.start = self.clock()
         self.current = 0
-        self.loop = loop
         self.done = False
 
     def update(self):
         if self.done: return
-        self.current += 0.15
-        if self.current >= len(self.frames):
-            if self.loop:
-                self.current = 0
-            else:
-                self.current = len(self.frames) - 1
-                self.done = True
-
-    def get_image(self):
-        return self.frames[int(self.current)]
\ No newline at end of file
+        elapsed = self.clock() - self.start
+        self.current = self.clip.index_at(elapsed)
+        self.done = self.clip.done_at(elapsed)
+
+    def get_image(self, facing_right=True):
+        return self.clip.frames.get(self.current, facing_right)
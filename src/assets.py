@@ -0,0 +1,123 @@
+# assets.py – Kho ảnh dùng chung cho cả game, giới hạn bộ nhớ theo LRU
+# Khóa: (đường dẫn, scale, flip, kiểu convert). Nạp lại level không đọc đĩa, không scale lại.
+import os
+import threading
+from collections import OrderedDict
+
+import pygame
+
+from profiler import PROFILER
+
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+
+def surface_bytes(value):
+    if value is None: return 0
+    if isinstance(value, (list, tuple)):
+        return sum(surface_bytes(v) for v in value)
+    if hasattr(value, "surfaces"):  # vd. animation.Clip
+        return surface_bytes(value.surfaces())
+    return value.get_pitch() * value.get_height()
+
+
+class AssetManager:
+    def __init__(self, budget_bytes=DEFAULT_BUDGET):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        # Bộ đếm để kiểm tra: nạp lại level phải giữ nguyên hai số này
+        self.disk_reads = 0
+        self.scale_calls = 0
+        # Level được nạp trước trên thread nền (preload.py) -> khóa cả lúc dựng
+        self.lock = threading.RLock()
+
+    # --- Bộ nhớ đệm chung ---
+    def cached(self, key, build):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+            value = build()
+            size = surface_bytes(value)
+            self.entries[key] = (value, size)
+            self.used_bytes += size
+            self._evict(keep=key)
+            return value
+
+    def _evict(self, keep):
+        # Bỏ mục ít dùng nhất cho tới khi về dưới ngân sách (mục vừa thêm luôn được giữ)
+        while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+            key, (_, size) = next(iter(self.entries.items()))
+            if key == keep: break
+            del self.entries[key]
+            self.used_bytes -= size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.used_bytes = 0
+
+    def stats(self):
+        return {"entries": len(self.entries), "used_bytes": self.used_bytes, "budget_bytes": self.budget_bytes,
+                "disk_reads": self.disk_reads, "scale_calls": self.scale_calls}
+
+    # --- Ảnh đơn ---
+    def _load(self, path, convert):
+        if not os.path.exists(path): return None
+        try:
+            img = pygame.image.load(path)
+        except pygame.error as e:
+            print(f"[Warning] Không đọc được ảnh {path}: {e}")
+            return None
+        self.disk_reads += 1
+        PROFILER.count("surfaces")
+        try:
+            if convert == "alpha": img = img.convert_alpha()
+            elif convert == "opaque": img = img.convert()
+        except pygame.error:
+            pass  # chưa có display: giữ nguyên định dạng gốc
+        return img
+
+    def image(self, path, scale=None, flip=False, convert="alpha"):
+        key = (path, scale, flip, convert)
+
+        def build():
+            if scale is None and not flip:
+                return self._load(path, convert)
+            base = self.image(path, None, False, convert)
+            if base is None: return None
+            img = base
+            if scale is not None:
+                img = pygame.transform.scale(img, scale)
+                self.scale_calls += 1
+            if flip:
+                img = pygame.transform.flip(img, True, False)
+            PROFILER.count("surfaces")
+            return img
+
+        return self.cached(key, build)
+
+    # --- Sprite sheet cắt theo hàng ngang (giống SpriteSheet.get_image của main) ---
+    def sheet_frames(self, path, count, frame_w, frame_h, scale=1, flip=False, convert="alpha", colorkey=(0, 0, 0)):
+        key = (path, ("frames", count, frame_w, frame_h), scale, flip, convert)
+
+        def build():
+            sheet = self.image(path, None, False, convert)
+            if sheet is None: return []
+            frames = []
+            for i in range(count):
+                image = pygame.Surface((frame_w, frame_h)).convert_alpha()
+                image.fill((0, 0, 0, 0))
+                image.blit(sheet, (0, 0), ((i * frame_w), 0, frame_w, frame_h))
+                image = pygame.transform.scale(image, (frame_w * scale, frame_h * scale))
+                self.scale_calls += 1
+                if flip: image = pygame.transform.flip(image, True, False)
+                image.set_colorkey(colorkey)
+                frames.append(image)
+            PROFILER.count("surfaces", count)
+            return frames
+
+        return self.cached(key, build)
+
+
+ASSETS = AssetManager(int(os.environ.get("ASSET_BUDGET_MB", "64")) * 1024 * 1024)
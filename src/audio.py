@@ -0,0 +1,119 @@
+# audio.py – Âm thanh độ trễ thấp: cấu hình mixer trước khi mở, kênh riêng theo nhóm, giới hạn số bản phát
+#   AUDIO_BUFFER=256 python main.py   (buffer nhỏ hơn -> trễ ít hơn, dễ rè hơn trên máy yếu)
+import os
+
+import pygame
+
+from profiler import STARTUP
+
+FREQUENCY = 44100
+BUFFER = int(os.environ.get("AUDIO_BUFFER", "512"))
+BGM_EXTENSIONS = (".mp3", ".wav", ".ogg")
+
+# tên -> (file, nhóm, âm lượng, số bản phát cùng lúc tối đa)
+SOUNDS = {
+    "hit": ("hit.wav", "alert", 1.0, 1),
+    "gameover": ("gameover.wav", "alert", 1.0, 1),
+    "jump": ("jump.wav", "move", 1.0, 2),
+    "coin": ("coin.wav", "pickup", 0.2, 3),
+}
+# nhóm -> số kênh giữ riêng; coin dồn dập không thể chiếm kênh của "hit" / "gameover"
+CATEGORIES = {"alert": 2, "move": 2, "pickup": 4}
+
+
+class AudioEngine:
+    def __init__(self, sound_dir, buffer=BUFFER, frequency=FREQUENCY, sounds=SOUNDS, categories=CATEGORIES):
+        self.sound_dir = sound_dir
+        self.buffer = buffer
+        self.frequency = frequency
+        self.specs = sounds
+        self.categories = categories
+        self.ready = False
+        self.sounds = {}
+        self.channels = {}   # nhóm -> [id kênh]
+        self.playing = {}    # id kênh -> (tên, thứ tự bắt đầu)
+        self.seq = 0
+        self.bgm_paths = {}  # tên nhạc -> đường dẫn (hoặc None nếu không có file)
+
+    def pre_init(self):
+        # Phải chạy trước pygame.mixer.init / pygame.init thì buffer mới có tác dụng
+        pygame.mixer.pre_init(self.frequency, -16, 2, self.buffer)
+
+    def init(self):
+        # Mở mixer + đọc mọi sfx một lần lúc khởi động (Game.__init__); play() không làm I/O.
+        # Chưa init (chạy headless / replay) thì play() chỉ im lặng
+        if self.ready: return
+        self.ready = True
+        with STARTUP.phase("mixer + sfx"):
+            self.pre_init()
+            try:
+                pygame.mixer.init()
+            except pygame.error as e:
+                print(f"[Warning] Không mở được âm thanh: {e}")
+                return
+
+            total = sum(self.categories.values())
+            if pygame.mixer.get_num_channels() < total:
+                pygame.mixer.set_num_channels(total)
+            pygame.mixer.set_reserved(total)  # Sound.play() tự do không lấy được các kênh này
+            first = 0
+            for cat, n in self.categories.items():
+                self.channels[cat] = list(range(first, first + n))
+                first += n
+
+            for name, (filename, cat, volume, cap) in self.specs.items():
+                path = os.path.join(self.sound_dir, filename)
+                if not os.path.exists(path): continue
+                try:
+                    snd = pygame.mixer.Sound(path)
+                except pygame.error as e:
+                    print(f"[Warning] Không đọc được âm thanh {path}: {e}")
+                    continue
+                snd.set_volume(volume)
+                self.sounds[name] = snd
+
+    def _pick_channel(self, name, cat, cap):
+        ids = self.channels[cat]
+        busy = [i for i in ids if pygame.mixer.Channel(i).get_busy()]
+        same = [i for i in busy if self.playing.get(i, (None,))[0] == name]
+        if len(same) >= cap:
+            # Đủ số bản của âm này -> phát lại trên bản cũ nhất
+            return min(same, key=lambda i: self.playing[i][1])
+        for i in ids:
+            if i not in busy: return i
+        # Nhóm hết kênh -> cướp kênh phát lâu nhất trong chính nhóm đó
+        return min(ids, key=lambda i: self.playing.get(i, (None, 0))[1])
+
+    def play(self, name):
+        snd = self.sounds.get(name)
+        if snd is None: return
+        _, cat, _, cap = self.specs[name]
+        i = self._pick_channel(name, cat, cap)
+        self.seq += 1
+        self.playing[i] = (name, self.seq)
+        pygame.mixer.Channel(i).play(snd)
+
+    def resolve_bgm(self, filename_base):
+        # Tìm file nhạc một lần cho mỗi tên; có đuôi thì dùng luôn, không thì thử .mp3 / .wav / .ogg
+        if filename_base in self.bgm_paths:
+            return self.bgm_paths[filename_base]
+        names = [filename_base] if "." in filename_base else [filename_base + ext for ext in BGM_EXTENSIONS]
+        found = next((p for p in (os.path.join(self.sound_dir, n) for n in names) if os.path.exists(p)), None)
+        if found is None:
+            # Không tìm thấy nhạc thì thôi, không báo lỗi làm dừng game
+            print(f"Chưa có file nhạc cho: {filename_base}")
+        self.bgm_paths[filename_base] = found
+        return found
+
+    def play_bgm(self, filename_base):
+        path = self.resolve_bgm(filename_base)
+        if path is None or not pygame.mixer.get_init(): return
+        try:
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(0.2)
+            pygame.mixer.music.play(-1)  # Lặp vô tận
+        except pygame.error as e:
+            print(f"Lỗi phát nhạc {path}: {e}")
+
+    def stop_bgm(self):
+        if pygame.mixer.get_init(): pygame.mixer.music.stop()
@@ -0,0 +1,196 @@
+# bench.py – Đo hiệu năng Game.update / Game.draw trên mọi level (SDL dummy, không cần màn hình)
+#   python bench.py [--ticks 2000] [--levels 1 2 3] [--enemies 2000] [--out bench.json]
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource  # chỉ có trên Unix; Windows thì bỏ qua số đo RSS
+except ImportError:
+    resource = None
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+import main
+from assets import ASSETS, surface_bytes
+from enemy import EnemySystem
+from inputs import Inputs
+from level_grid import LevelGrid
+
+
+def find_levels():
+    found = []
+    for name in os.listdir(main.PATHS["tiles"]):
+        m = re.fullmatch(r"level(\d+)\.json", name)
+        if m: found.append(int(m.group(1)))
+    return sorted(found)
+
+
+def scripted_inputs(seed):
+    # Chủ yếu chạy sang phải, nhảy theo nhịp, thỉnh thoảng lùi lại – giống người chơi thật
+    rnd = random.Random(seed)
+    tick = 0
+    while True:
+        tick += 1
+        back = rnd.random() < 0.08
+        yield Inputs(left=back, right=not back, jump=tick % 37 < 3 or rnd.random() < 0.05)
+
+
+def percentile(samples, p):
+    if not samples: return 0.0
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[k]
+
+
+def summarize(samples):
+    ms = [s * 1000 for s in samples]
+    return {"mean": round(sum(ms) / len(ms), 4) if ms else 0.0, "p99": round(percentile(ms, 99), 4)}
+
+
+def run_ticks(game, level, ticks):
+    inputs = scripted_inputs(level)
+    game.start_specific_level(level)
+    update_t, draw_t, load_t = [], [], []
+    clock = time.perf_counter
+    for _ in range(ticks):
+        # Chết / thắng -> chơi lại chính level này để số tick mỗi level bằng nhau
+        if game.state != "playing" or game.level_idx != level:
+            game.level_idx = level
+            game.restart_level()
+        # Tick đầu sau (re)start còn dựng level: đo riêng thành load_ms, không lẫn vào update_ms
+        if game.game_level is None:
+            t0 = clock()
+            game.update(next(inputs))
+            game.draw()
+            load_t.append(clock() - t0)
+        t0 = clock()
+        game.update(next(inputs))
+        t1 = clock()
+        game.draw()
+        t2 = clock()
+        update_t.append(t1 - t0)
+        draw_t.append(t2 - t1)
+    return update_t, draw_t, load_t
+
+
+def peak_rss_kb():
+    # ru_maxrss: KB trên Linux, byte trên macOS
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def bench_level(game, level, ticks):
+    # Bộ nhớ đo theo RSS (gồm cả Surface của SDL) và số byte của các cache Surface,
+    # tracemalloc chỉ thấy heap Python nên bỏ sót chunk tile / ảnh đã scale
+    rss_before = peak_rss_kb()
+    update_t, draw_t, load_t = run_ticks(game, level, ticks)
+    rss_after = peak_rss_kb()
+    chunks = game.game_level.static_layer.chunks.values() if game.game_level else ()
+
+    total_update = sum(update_t)
+    total_frame = total_update + sum(draw_t)
+    return {
+        "level": level,
+        "ticks": ticks,
+        "ticks_per_sec": round(ticks / total_update, 1) if total_update else None,
+        "frames_per_sec": round(ticks / total_frame, 1) if total_frame else None,
+        "update_ms": summarize(update_t),
+        "draw_ms": summarize(draw_t),
+        "loads": len(load_t),
+        "load_ms": summarize(load_t),
+        "peak_rss_kb": rss_after,
+        "peak_rss_delta_kb": rss_after - rss_before if rss_after is not None else None,
+        "asset_cache_kb": round(ASSETS.used_bytes / 1024, 1),
+        "chunk_surfaces_kb": round(sum(surface_bytes(c) for c in chunks) / 1024, 1),
+    }
+
+
+def bench_enemies(count, cols=4000, ticks=500):
+    # EnemySystem ở quy mô lớn: dựng, một lần đổi tile dưới chân cả đám, và update mỗi tick (chỉ báo số)
+    rows = ["." * cols] * 8 + ["#" + "." * (cols - 2) + "#"] + ["#" * cols] * 2
+    grid = LevelGrid.from_rows(rows, 32)
+    spawns = [((1 + i * 7 % (cols - 2)) * 32, 8 * 32) for i in range(count)]
+    clock = time.perf_counter
+    EnemySystem(grid, spawns[:10])  # làm nóng numpy
+    t0 = clock()
+    enemies = EnemySystem(grid, spawns)
+    t1 = clock()
+    grid.set_tile(cols // 2, 9, ord('.'))
+    enemies.on_tile_changed(cols // 2, 9)
+    t2 = clock()
+    update_t = []
+    for _ in range(ticks):
+        t = clock()
+        enemies.update()
+        update_t.append(clock() - t)
+    return {
+        "enemies": count,
+        "columns": cols,
+        "build_ms": round((t1 - t0) * 1000, 3),
+        "tile_change_ms": round((t2 - t1) * 1000, 3),
+        "update_ms": summarize(update_t),
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=main.PATHS["root"],
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Game.update / Game.draw per level")
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--levels", type=int, nargs="*")
+    parser.add_argument("--enemies", type=int, default=2000, help="số enemy cho phần đo EnemySystem (0 = bỏ qua)")
+    parser.add_argument("--out", help="ghi JSON vào file thay vì in ra stdout")
+    args = parser.parse_args(argv)
+
+    # Log của game (nhạc nền...) đưa sang stderr để stdout chỉ còn JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        # Shop tạm để benchmark không đụng vào file save thật
+        shop_dir = tempfile.mkdtemp(prefix="bench_shop_")
+        try:
+            game = main.Game(record_replays=False, preload=False, shop=main.ShopManager(os.path.join(shop_dir, "shop_state.json")))
+            results = [bench_level(game, lv, args.ticks) for lv in (args.levels or find_levels())]
+            game.shop.flush()
+        finally:
+            shutil.rmtree(shop_dir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+        "levels": results,
+        "enemy_system": bench_enemies(args.enemies) if args.enemies > 0 else None,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli(sys.argv[1:])
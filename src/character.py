@@ -1,7 +1,8 @@
 import pygame
 import os
 from sprite import SpriteSheet
-from animation import Animation
+from animation import Animation, Clip, get_clip
+from assets import ASSETS
 
 class Player:
     def __init__(self, x, y, skin="nhanvat1"):
@@ -19,36 +20,37 @@ class Player:
         self.load_animations()
 
     def load_animations(self):
+        # Clip (frame + tốc độ) dùng chung cho mọi Player cùng skin; mỗi Player chỉ giữ Animation (con trỏ phát)
         size = (48, 48)
         folder = f"assets/characters/{self.skin}"
 
-        # Idle sheet
-        idle_path = f"{folder}/Idle (32x32).png"
-        if os.path.exists(idle_path):
-            idle_sheet = SpriteSheet(idle_path)
-            self.anims["idle"] = Animation(idle_sheet.get_animation(0, 0, 32, 32, 10, size))
+        def sheet_clip(action, count):
+            path = f"{folder}/{action} (32x32).png"
+            if not os.path.exists(path): return None
+            return Clip(SpriteSheet(path).get_animation(0, 0, 32, 32, count, size), 9)
 
-        # Run sheet
-        run_path = f"{folder}/Run (32x32).png"
-        if os.path.exists(run_path):
-            run_sheet = SpriteSheet(run_path)
-            self.anims["run"] = Animation(run_sheet.get_animation(0, 0, 32, 32, 12, size))
+        def single_clip(action):
+            img = ASSETS.image(f"{folder}/{action} (32x32).png", size)
+            return Clip([img], 9, loop=False) if img else None
 
+        clips = {
+            "idle": get_clip(("character", self.skin, "idle"), lambda: sheet_clip("Idle", 10)),
+            "run": get_clip(("character", self.skin, "run"), lambda: sheet_clip("Run", 12)),
+        }
         # Các hành động còn lại (Jump, Fall, Hit, v.v.)
         for action in ["Jump", "Fall", "Hit", "Double Jump", "Wall Jump"]:
-            action_path = f"{folder}/{action} (32x32).png"
-            if os.path.exists(action_path):
-                img = pygame.image.load(action_path).convert_alpha()
-                img = pygame.transform.scale(img, size)
-                key = action.lower().replace(" ", "_")
-                self.anims[key] = Animation([img], loop=False)
+            key = action.lower().replace(" ", "_")
+            clips[key] = get_clip(("character", self.skin, key), lambda: single_clip(action))
 
         # Nếu thiếu thì dùng idle làm mặc định
-        if "idle" not in self.anims:
-            fallback = pygame.Surface((48, 48))
-            fallback.fill((255, 0, 255))
-            self.anims["idle"] = Animation([fallback])
+        if clips["idle"] is None:
+            def fallback():
+                surf = pygame.Surface((48, 48))
+                surf.fill((255, 0, 255))
+                return Clip([surf], 9)
+            clips["idle"] = get_clip(("character", None, "idle"), fallback)
 
+        self.anims = {key: Animation(clip) for key, clip in clips.items() if clip}
         self.current_anim = self.anims["idle"]
 
     def update(self, keys):
@@ -80,11 +82,11 @@ class Player:
             else:
                 self.state = "idle"
 
-        self.current_anim = self.anims.get(self.state, self.anims["idle"])
+        anim = self.anims.get(self.state, self.anims["idle"])
+        if anim is not self.current_anim:
+            anim.reset()
+            self.current_anim = anim
         self.current_anim.update()
 
     def draw(self, screen):
-        img = self.current_anim.get_image()
-        if not self.facing_right:
-            img = pygame.transform.flip(img, True, False)
-        screen.blit(img, self.rect)
\ No newline at end of file
+        screen.blit(self.current_anim.get_image(self.facing_right), self.rect)
\ No newline at end of file
@@ -0,0 +1,118 @@
+# collision.py – Lưới va chạm cho tile rắn ('#' và 'S')
+# Ô rắn liền nhau cùng loại được gộp thành khối chữ nhật lớn; mỗi ô trỏ tới khối chứa nó.
+from array import array
+
+import pygame
+
+from profiler import PROFILER
+
+SOLID_TILES = b"#S"
+
+
+def merge_cells(level_grid, solid_tiles=SOLID_TILES):
+    # Gộp tham lam theo hàng: kéo dài sang phải hết mức, rồi kéo xuống dưới khi cả hàng dưới cùng loại.
+    # Trả list (c0, r0, c1, r1, mã tile, ground kind) – ground kind tách '#' thành top / center để vẽ.
+    w, h = level_grid.width, level_grid.height
+    codes = level_grid.codes
+    ground = level_grid.ground
+    solid = set(solid_tiles)
+    key = [(code << 2) | ground[i] if code in solid else 0 for i, code in enumerate(codes)]
+    used = bytearray(w * h)
+    blocks = []
+    for r0 in range(h):
+        for c0 in range(w):
+            i = r0 * w + c0
+            k = key[i]
+            if not k or used[i]: continue
+            c1 = c0
+            while c1 + 1 < w and key[i + c1 + 1 - c0] == k and not used[i + c1 + 1 - c0]:
+                c1 += 1
+            n = c1 - c0 + 1
+            r1 = r0
+            while r1 + 1 < h:
+                j = (r1 + 1) * w + c0
+                if key[j:j + n] != [k] * n or any(used[j:j + n]): break
+                r1 += 1
+            for r in range(r0, r1 + 1):
+                used[r * w + c0:r * w + c1 + 1] = b"\x01" * n
+            blocks.append((c0, r0, c1, r1, k >> 2, k & 3))
+    return blocks
+
+
+class SolidGrid:
+    # Dựng một lần mỗi level từ LevelGrid (blocks có sẵn từ cache level thì khỏi gộp lại)
+    def __init__(self, level_grid, solid_tiles=SOLID_TILES, blocks=None):
+        self.grid = level_grid
+        self.tile_size = level_grid.tile_size
+        self.width = level_grid.width
+        self.height = level_grid.height
+        self.solid = bytearray(256)
+        for code in solid_tiles:
+            self.solid[code] = 1
+
+        self.blocks = []  # (c0, r0, c1, r1, mã, ground) hoặc None nếu khối đã bị tách
+        self.rects = []   # Rect pixel tương ứng từng khối
+        self.cell_ids = array("i", [-1]) * (self.width * self.height)
+        for b in (blocks if blocks is not None else merge_cells(level_grid, solid_tiles)):
+            self._add(b)
+
+    def _add(self, block):
+        c0, r0, c1, r1 = block[:4]
+        k = len(self.blocks)
+        ts = self.tile_size
+        self.blocks.append(block)
+        self.rects.append(pygame.Rect(c0 * ts, r0 * ts, (c1 - c0 + 1) * ts, (r1 - r0 + 1) * ts))
+        run = array("i", [k]) * (c1 - c0 + 1)
+        for r in range(r0, r1 + 1):
+            self.cell_ids[r * self.width + c0:r * self.width + c1 + 1] = run
+
+    def solid_rects(self):
+        return [r for r, b in zip(self.rects, self.blocks) if b]
+
+    def is_solid(self, col, row):
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.solid[self.grid.codes[row * self.width + col]] == 1
+        return False
+
+    def _split(self, col, row):
+        # Tách khối chứa ô (col, row) lại thành các khối 1x1 theo tile hiện tại
+        if not (0 <= col < self.width and 0 <= row < self.height): return
+        k = self.cell_ids[row * self.width + col]
+        if k < 0: return
+        c0, r0, c1, r1 = self.blocks[k][:4]
+        self.blocks[k] = None
+        codes, ground = self.grid.codes, self.grid.ground
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                i = r * self.width + c
+                self.cell_ids[i] = -1
+                if self.solid[codes[i]]: self._add((c, r, c, r, codes[i], ground[i]))
+
+    def invalidate_cell(self, col, row):
+        # Tile đổi (LevelGrid.set_tile): tách khối chứa ô đó và khối ngay dưới (ground top/center
+        # của ô dưới đổi theo), ô mới thành rắn thì thêm một khối 1x1
+        self._split(col, row)
+        self._split(col, row + 1)
+        if not (0 <= col < self.width and 0 <= row < self.height): return
+        i = row * self.width + col
+        code = self.grid.codes[i]
+        if self.solid[code] and self.cell_ids[i] < 0:
+            self._add((col, row, col, row, code, self.grid.ground[i]))
+
+    def query(self, rect):
+        # Các khối chạm rect, theo thứ tự ô đầu tiên của khối gặp khi duyệt theo hàng
+        ts = self.tile_size
+        c0 = max(rect.left // ts, 0)
+        c1 = min((rect.right - 1) // ts, self.width - 1)
+        r0 = max(rect.top // ts, 0)
+        r1 = min((rect.bottom - 1) // ts, self.height - 1)
+
+        ids = self.cell_ids
+        seen = []
+        for y in range(r0, r1 + 1):
+            base = y * self.width
+            for k in ids[base + c0:base + c1 + 1]:
+                if k >= 0 and k not in seen: seen.append(k)
+        rects = self.rects
+        PROFILER.count("collision tests", len(seen))
+        return [rects[k] for k in seen if rect.colliderect(rects[k])]
@@ -61,16 +61,16 @@ class DummyPlayer:
 
         # --- MOVE X ---
         self.rect.x += self.vel_x
-        self.check_collision_x(level.all_solids)
+        self.check_collision_x(level.solid_grid)
 
         # --- MOVE Y ---
         self.rect.y += self.vel_y
-        self.check_collision_y(level.all_solids)
+        self.check_collision_y(level.solid_grid)
     # ----------------------------------------------------
     # Collision X
     # ----------------------------------------------------
-    def check_collision_x(self, platforms):
-        for p in platforms:
+    def check_collision_x(self, solid_grid):
+        for p in solid_grid.query(self.rect):
             if self.rect.colliderect(p):
                 if self.vel_x > 0:
                     self.rect.right = p.left
@@ -80,10 +80,10 @@ class DummyPlayer:
     # ----------------------------------------------------
     # Collision Y
     # ----------------------------------------------------
-    def check_collision_y(self, platforms):
+    def check_collision_y(self, solid_grid):
         self.on_ground = False
 
-        for p in platforms:
+        for p in solid_grid.query(self.rect):
             if self.rect.colliderect(p):
 
                 # rơi xuống platform
@@ -1,5 +1,8 @@
+import numpy as np
 import pygame
 
+from profiler import PROFILER
+
 class EnemyBase:
     def __init__(self, x, y, w=32, h=32):
         self.rect = pygame.Rect(x, y, w, h)
@@ -13,17 +16,21 @@ class EnemyBase:
         surf.blit(image, self.rect.topleft)
 
 class EnemyWalk(EnemyBase):
-    def __init__(self, x, y, speed=1):
+    # span = (left, right): đoạn x được phép đi, mặc định là map boundary giả lập của demo
+    def __init__(self, x, y, speed=1, span=(0, 600)):
         super().__init__(x, y)
         self.speed = speed
         self.direction = 1
+        self.left, self.right = span
 
     def update(self, dt):
         if not self.dead:
-            self.rect.x += self.speed * self.direction
-            # đảo chiều khi va phải map boundary giả lập
-            if self.rect.x < 0 or self.rect.x > 600:
+            x = self.rect.x + self.speed * self.direction
+            # chạm mép đoạn đi tuần: dừng ở mép và đảo chiều
+            if x < self.left or x > self.right:
+                x = min(max(x, self.left), self.right)
                 self.direction *= -1
+            self.rect.x = x
 
 class EnemyIdle(EnemyBase):
     def update(self, dt):
@@ -35,3 +42,218 @@ class EnemyDead(EnemyBase):
             self.frame += 1
         else:
             self.dead = True
+
+
+# -------- HỆ THỐNG ENEMY DẠNG MẢNG (main.Level dùng) --------
+# Mỗi thuộc tính là một mảng NumPy, mọi enemy được cập nhật trong một bước theo lưới tile của level.
+# speed = 0 là enemy đứng yên, speed > 0 là enemy đi tuần.
+# Đoạn đi tuần [lo, hi] là chỗ dò tường / mép vực từng tick sẽ cho enemy quay đầu. Nó tính trên lưới tile:
+# mỗi "làn" (hàng thân + hàng dò đất) giữ cờ theo cột và bảng "cột chặn kế tiếp" hai phía, nên mỗi lượt dò
+# chỉ nhảy qua vài cột chặn thay vì đi từng px. Enemy cùng làn dùng chung bảng; mỗi tick chỉ còn so với
+# hai mốc; tile đổi (LevelGrid.set_tile) thì chỉ sửa bảng quanh ô đó và tính lại enemy gần nó.
+ENEMY_SIZE = 32
+SOLID_TILES = b"#S"
+LEDGE_PROBE = 5     # ô dò đất phía trước chân: 5x5 px, thấp hơn chân 5 px
+LANE_MARGIN = 2     # số cột đệm ngoài mỗi mép map (không có đất) trong bảng của làn
+WALK_HOPS = 8       # số cột chặn tối đa xét mỗi lượt dò (speed nhỏ hơn một ô là đủ 1-2 lần)
+
+
+class _Lane:
+    # Các enemy có cùng hàng thân (body) và hàng dò đất (probe). Theo từng cột (đệm LANE_MARGIN cột
+    # ngoài map ở hai bên, chỉ số = cột + LANE_MARGIN): wall = có ô rắn chắn thân, ground = có đất dưới
+    # chân, shut = có chỗ bắt enemy quay đầu. nxt / prv = cột shut gần nhất ở bên phải / trái (kể cả nó).
+    def __init__(self, mask, body, probe):
+        self.body, self.probe = body, probe
+        n = mask.shape[1] + 2 * LANE_MARGIN
+        inner = slice(LANE_MARGIN, n - LANE_MARGIN)
+        self.wall = np.zeros(n, dtype=bool)
+        self.ground = np.zeros(n, dtype=bool)
+        self.wall[inner] = mask[body].any(axis=0)
+        self.ground[inner] = mask[probe].any(axis=0)
+        self.shut = self.wall | ~self.ground
+        idx = np.arange(n, dtype=np.int64)
+        self.prv = np.maximum.accumulate(np.where(self.shut, idx, 0))
+        self.nxt = np.minimum.accumulate(np.where(self.shut, idx, n - 1)[::-1])[::-1].copy()
+
+    def covers(self, row):
+        return self.body.start <= row < self.body.stop or self.probe.start <= row < self.probe.stop
+
+    def set_cell(self, mask, col):
+        # Ô (col, *) đổi: chỉ các cột giữa hai cột shut gần nhất hai bên có nxt / prv đổi theo
+        i = col + LANE_MARGIN
+        self.wall[i] = mask[self.body, col].any()
+        self.ground[i] = mask[self.probe, col].any()
+        self.shut[i] = self.wall[i] or not self.ground[i]
+        left, right = int(self.prv[i - 1]), int(self.nxt[i + 1])
+        self.nxt[left + 1:i + 1] = i if self.shut[i] else right
+        self.prv[i:right] = i if self.shut[i] else left
+
+
+class EnemySystem:
+    def __init__(self, grid, positions, clip=None, clock=None, speed=1, solid_tiles=SOLID_TILES):
+        self.grid = grid
+        self.ts = grid.tile_size
+        self.w = self.h = ENEMY_SIZE
+        # View trực tiếp lên bytearray của LevelGrid: tile đổi thì kết quả va chạm đổi theo
+        self.codes = np.frombuffer(grid.codes, dtype=np.uint8).reshape(grid.height, grid.width)
+        self.solid = np.zeros(256, dtype=bool)
+        self.solid[list(solid_tiles)] = True
+        self.mask = self.solid[self.codes]   # ô rắn, on_tile_changed chỉ sửa đúng ô đã đổi
+        self.lanes = []
+        self.lane_ids = {}
+
+        pos = np.array(positions, dtype=np.int64).reshape(-1, 2)
+        n = len(pos)
+        self.x = pos[:, 0].copy()
+        self.y = pos[:, 1].copy()
+        self.speed = np.full(n, speed, dtype=np.int64)
+        self.direction = np.ones(n, dtype=np.int64)
+        self.facing = np.ones(n, dtype=np.int64)   # hướng lúc di chuyển ở tick vừa rồi (để vẽ)
+        self.phase = np.zeros(n, dtype=np.int64)   # lệch pha animation (ms)
+        self.alive = np.ones(n, dtype=bool)
+        ys, inv = np.unique(self.y, return_inverse=True)
+        self.lane = np.array([self._lane_for(y) for y in ys.tolist()], dtype=np.int64)[inv.ravel()]
+        self.lo = self.x.copy()
+        self.hi = self.x.copy()
+        self.refresh_spans(np.arange(n))
+
+        self.clip = clip
+        self.clock = clock or pygame.time.get_ticks
+        self.start = self.clock()
+        self.blank = pygame.Surface((self.w, self.h))  # enemy không có ảnh: khối đen như trước
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def _lane_for(self, y):
+        # Hàng thân và hàng ô dò đất của enemy đứng ở độ cao y (kẹp vào map: ngoài map là ô rỗng)
+        ts, rows = self.ts, self.grid.height
+        def span(top, bottom):
+            return min(max(top // ts, 0), rows), min(max(bottom // ts + 1, 0), rows)
+        foot = y + self.h + LEDGE_PROBE
+        key = (span(y, y + self.h - 1), span(foot, foot + LEDGE_PROBE - 1))
+        k = self.lane_ids.get(key)
+        if k is None:
+            k = self.lane_ids[key] = len(self.lanes)
+            self.lanes.append(_Lane(self.mask, slice(*key[0]), slice(*key[1])))
+        return k
+
+    def add(self, x, y, speed=1, direction=1, phase=0):
+        self.x = np.append(self.x, x)
+        self.y = np.append(self.y, y)
+        self.speed = np.append(self.speed, speed)
+        self.direction = np.append(self.direction, direction)
+        self.facing = np.append(self.facing, direction)
+        self.phase = np.append(self.phase, phase)
+        self.alive = np.append(self.alive, True)
+        self.lane = np.append(self.lane, self._lane_for(y))
+        self.lo = np.append(self.lo, x)
+        self.hi = np.append(self.hi, x)
+        i = len(self.x) - 1
+        self.refresh_spans([i])
+        return i
+
+    def kill(self, i):
+        self.alive[i] = False
+
+    def rect(self, i):
+        return pygame.Rect(int(self.x[i]), int(self.y[i]), self.w, self.h)
+
+    def _walk(self, lane, x, s, d):
+        # Điểm xa nhất (trên lưới bước x + k * s) đi tới được từ x theo hướng d trước khi phải quay đầu,
+        # giống dò tường / đất từng tick. Mỗi cột shut c cho một khoảng x bị chặn:
+        #   đi phải: thân lấn vào tường c, hoặc ô dò đất phía trước rơi hẳn vào chỗ trống quanh c
+        #   đi trái: như trên nhưng ô dò đất nằm bên trái thân
+        # Xét lần lượt các cột shut theo hướng đi, khoảng đầu tiên chứa một điểm trên lưới là chỗ dừng.
+        ts, w, P, m = self.ts, self.w, LEDGE_PROBE, LANE_MARGIN
+        n = len(lane.shut)
+        right = d == 1
+        todo = s > 0
+        s = np.where(todo, s, 1)
+        out = x.copy()
+        c = np.where(right, (x + s) // ts - 1, (x - s + w - 1) // ts + 1)
+        i = np.minimum(np.maximum(c + m, 0), n - 1)
+        i = np.where(right, lane.nxt[i], lane.prv[i])
+        for _ in range(WALK_HOPS):
+            c = i - m
+            wall, bare = lane.wall[i], ~lane.ground[i]
+            bare_next = ~lane.ground[np.minimum(i + 1, n - 1)]
+            bare_prev = ~lane.ground[np.maximum(i - 1, 0)]
+            # Khoảng bị chặn khi đi phải: [r0, r1]; khi đi trái: [l0, l1]
+            r0 = c * ts - w + ~bare
+            r1 = np.maximum(np.where(wall, (c + 1) * ts - 1, r0 - 1),
+                            np.where(bare, (c + 1) * ts - P - w + bare_next * (P - 1), r0 - 1))
+            l0 = np.where(wall, c * ts - w + 1, c * ts + np.where(bare_prev, 1, P))
+            l1 = (c + 1) * ts - 1 + bare
+            first = x - s * ((x - np.maximum(r0, x + s)) // s)      # điểm lưới đầu tiên >= r0, sau x
+            last = x + s * ((np.minimum(l1, x - s) - x) // s)       # điểm lưới cuối cùng <= l1, trước x
+            hit = todo & np.where(right, first <= r1, last >= l0)
+            out = np.where(hit, np.where(right, first - s, last + s), out)
+            todo &= ~hit
+            if not todo.any(): break
+            i = np.where(right, lane.nxt[np.minimum(i + 1, n - 1)], lane.prv[np.maximum(i - 1, 0)])
+        return out
+
+    def refresh_spans(self, indices):
+        # Đi theo hướng hiện tại tới chỗ quay đầu, quay lại tới chỗ quay đầu kia, rồi đi lần nữa: chỗ
+        # đứng hiện tại có thể lơ lửng một phần trên vực (tile vừa đổi), lượt về mới là đoạn qua lại thật.
+        idx = np.asarray(indices, dtype=np.int64)
+        for k in np.unique(self.lane[idx]).tolist():
+            sel = idx[self.lane[idx] == k]
+            lane = self.lanes[k]
+            x, s, d = self.x[sel], self.speed[sel], self.direction[sel]
+            back = self._walk(lane, self._walk(lane, x, s, d), s, -d)
+            end = self._walk(lane, back, s, d)
+            self.lo[sel] = np.where(d == 1, back, end)
+            self.hi[sel] = np.where(d == 1, end, back)
+
+    def on_tile_changed(self, col, row):
+        # Sửa bảng của các làn phủ hàng đó, rồi chỉ tính lại enemy có đoạn đi tuần / ô dò (nới một ô)
+        # chạm tới cột vừa đổi
+        self.mask[row, col] = self.solid[self.codes[row, col]]
+        ts, P = self.ts, LEDGE_PROBE
+        near = (self.alive & ((self.lo - P) // ts - 1 <= col) & (col <= (self.hi + self.w + P) // ts + 1))
+        hit = np.zeros(len(self.x), dtype=bool)
+        for k, lane in enumerate(self.lanes):
+            if not lane.covers(row): continue
+            lane.set_cell(self.mask, col)
+            hit |= near & (self.lane == k)
+        idx = np.flatnonzero(hit)
+        if len(idx): self.refresh_spans(idx)
+        return idx
+
+    def update(self):
+        # Kẹp trong [lo, hi]: bước kế tiếp vượt mốc phía trước thì đứng yên và quay đầu
+        idx = np.flatnonzero(self.alive & (self.speed != 0))
+        if not len(idx): return
+        d = self.direction[idx]
+        x = self.x[idx] + self.speed[idx] * d
+        self.facing[idx] = d
+        turn = np.where(d == 1, x > self.hi[idx], x < self.lo[idx])
+        self.x[idx] = np.where(turn, self.x[idx], x)
+        self.direction[idx] = np.where(turn, -d, d)
+
+    def touching(self, rect):
+        # Chỉ số các enemy còn sống mà hitbox (thu nhỏ 3px mỗi cạnh) chạm rect, theo thứ tự thêm vào
+        PROFILER.count("collision tests", len(self.x))
+        ex, ey = self.x + 3, self.y + 3
+        hit = (self.alive & (rect.left < ex + self.w - 6) & (rect.right > ex)
+               & (rect.top < ey + self.h - 6) & (rect.bottom > ey))
+        return np.flatnonzero(hit)
+
+    def centery(self, i):
+        return int(self.y[i]) + self.h // 2
+
+    def draw(self, screen, offset_x, view_width):
+        # Lọc camera bằng một phép so sánh trên cả mảng x thay cho chỉ mục cột: enemy di chuyển mỗi tick
+        # nên chỉ mục phải cập nhật lại liên tục, còn phép lọc này chỉ tốn ~7 us cho 2000 enemy.
+        vis = np.flatnonzero(self.alive & (self.x + self.w > offset_x) & (self.x < offset_x + view_width))
+        if not len(vis): return
+        if self.clip:
+            n = len(self.clip)
+            frame = ((self.clock() - self.start + self.phase[vis]) * self.clip.fps // 1000) % n
+            frames = self.clip.frames
+        for k, i in enumerate(vis):
+            img = frames.get(int(frame[k]), self.facing[i] != -1) if self.clip else self.blank
+            screen.blit(img, (int(self.x[i]) - offset_x, int(self.y[i])))
+        PROFILER.count("blits", len(vis))
@@ -0,0 +1,280 @@
+# env.py – Môi trường kiểu gym cho agent: Env chạy một Simulation headless, VectorEnv chạy N Env
+# trên các process con và trao đổi observation / reward qua shared memory.
+#   python env.py [--envs 64] [--workers N] [--steps 20000] [--levels 1 2 3]   # đo số bước/giây
+import argparse
+import math
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+import main
+from inputs import Inputs
+from observation import FrameBuffer, MiniMap, TileWindow
+
+# Hành động rời rạc: đứng yên, trái, phải, nhảy, trái + nhảy, phải + nhảy
+ACTIONS = [Inputs(False, False, False), Inputs(True, False, False), Inputs(False, True, False),
+           Inputs(False, False, True), Inputs(True, False, True), Inputs(False, True, True)]
+
+REWARDS = {
+    "coin": 1.0,        # mỗi coin nhặt được
+    "progress": 0.05,   # mỗi tile tiến gần tới G (lùi xa thì trừ)
+    "life": -1.0,       # mất một mạng
+    "death": -5.0,      # hết mạng
+    "win": 10.0,        # chạm G
+}
+MAX_TICKS = 60 * 120    # cắt episode sau 2 phút giờ game
+NEAREST_ENEMIES = 3
+# x, y, vel_x, vel_y, on_ground, lives, invincible, dx / dy tới G, rồi dx / dy tới 3 enemy gần nhất
+OBS_SIZE = 9 + 2 * NEAREST_ENEMIES
+MAX_LIVES = 6
+
+
+class Env:
+    def __init__(self, level=1, max_ticks=MAX_TICKS, rewards=REWARDS):
+        self.level = level
+        self.max_ticks = max_ticks
+        self.rewards = rewards
+        self.sim = None
+        self.obs = np.zeros(OBS_SIZE, dtype=np.float32)
+        self.framebuf = None
+        self.minimap = self.tile_window = None
+
+    def reset(self, level=None, out=None):
+        if level is not None: self.level = level
+        self.sim = main.Simulation.from_level(self.level)
+        if self.sim is None: raise ValueError(f"Không có level {self.level}")
+        data = self.sim.level.data
+        self.map_w = data["width"] * data["tile_size"]
+        self.map_h = data["height"] * data["tile_size"]
+        self.goal = data["goal"].center
+        self.dist = self._goal_distance()
+        self._drop_observers()  # gắn với level cũ, dựng lại khi được hỏi
+        return self.observe(out)
+
+    def _goal_distance(self):
+        r = self.sim.player.rect
+        return math.hypot(self.goal[0] - r.centerx, self.goal[1] - r.centery)
+
+    def observe(self, out=None):
+        # Ghi thẳng vào out (vd. một hàng của mảng shared memory) nếu có, không tạo mảng mới
+        o = self.obs if out is None else out
+        p = self.sim.player
+        r = p.rect
+        w, h = self.map_w, self.map_h
+        o[:9] = (r.centerx / w, r.centery / h, p.vel_x / 4, p.vel_y / 20, p.on_ground,
+                 p.lives / MAX_LIVES, p.invincible, (self.goal[0] - r.centerx) / w, (self.goal[1] - r.centery) / h)
+
+        # Enemy gần nhất (còn sống); thiếu thì điền 0
+        o[9:] = 0
+        en = self.sim.level.enemies
+        live = np.flatnonzero(en.alive)
+        if len(live):
+            dx = (en.x[live] + en.w // 2 - r.centerx) / w
+            dy = (en.y[live] + en.h // 2 - r.centery) / h
+            k = min(NEAREST_ENEMIES, len(live))
+            near = np.argsort(dx * dx + dy * dy)[:k]
+            o[9:9 + 2 * k:2] = dx[near]
+            o[10:10 + 2 * k:2] = dy[near]
+        return o
+
+    # -------- Quan sát dạng ảnh / tile (dựng lười, trả view dùng lại: cần giữ thì tự copy) --------
+    def frame(self):
+        # Ảnh RGB (SCREEN_HEIGHT, SCREEN_WIDTH, 3) uint8 vẽ thẳng vào bộ nhớ numpy
+        if self.framebuf is None: self.framebuf = FrameBuffer((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+        return self.framebuf.render(self.sim.level, self.sim.player)
+
+    def _drop_observers(self):
+        # MiniMap / TileWindow nghe LevelGrid.set_tile: bỏ đăng ký trước khi thay bằng cái mới
+        for obs in (self.minimap, self.tile_window):
+            if obs is not None: obs.close()
+        self.minimap = self.tile_window = None
+
+    def small_frame(self, scale=4):
+        # Ảnh chỉ số palette (observation.PALETTE) thu nhỏ 1/scale, không qua Surface full-size
+        if self.minimap is None or self.minimap.scale != scale:
+            if self.minimap is not None: self.minimap.close()
+            self.minimap = MiniMap(self.sim.level, (main.SCREEN_WIDTH, main.SCREEN_HEIGHT), scale)
+        return self.minimap.render(self.sim.player)
+
+    def tiles(self, radius=(5, 8)):
+        # Cửa sổ mã tile (2*radius + 1) quanh player, cắt thẳng từ lưới level
+        if self.tile_window is None or (self.tile_window.rr, self.tile_window.rc) != tuple(radius):
+            if self.tile_window is not None: self.tile_window.close()
+            self.tile_window = TileWindow(self.sim.level, radius)
+        return self.tile_window.window(self.sim.player)
+
+    def step(self, action, out=None):
+        # action: chỉ số trong ACTIONS hoặc một Inputs; trả (obs, reward, done, info)
+        inputs = ACTIONS[action] if isinstance(action, (int, np.integer)) else action
+        p = self.sim.player
+        lives, coins = p.lives, p.coins
+        self.sim.step(inputs)
+
+        rw = self.rewards
+        dist = self._goal_distance()
+        reward = rw["progress"] * (self.dist - dist) / self.sim.level.ts
+        self.dist = dist
+        reward += rw["coin"] * (p.coins - coins)
+        if p.lives < lives: reward += rw["life"] * (lives - p.lives)
+        if p.dead: reward += rw["death"]
+        if p.win: reward += rw["win"]
+
+        done = self.sim.done or self.sim.ticks >= self.max_ticks
+        info = {"ticks": self.sim.ticks, "coins": p.coins, "lives": max(p.lives, 0), "win": p.win}
+        return self.observe(out), reward, done, info
+
+
+# -------- CHẠY SONG SONG --------
+# Một khối shared memory cho mọi env: obs (N x OBS_SIZE float32), reward, done, action, thống kê.
+# Process cha ghi action rồi gửi "step" qua Pipe; mỗi worker chạy phần env của mình, ghi kết quả
+# vào đúng hàng rồi trả lời. Không pickle observation qua Pipe.
+STAT_FIELDS = ("ticks", "coins", "lives", "win")
+
+
+def _layout(n):
+    # (tên, dtype, shape) theo thứ tự trong khối; mảng nào cũng căn 8 byte
+    fields = [("obs", np.float32, (n, OBS_SIZE)), ("reward", np.float32, (n,)), ("done", np.uint8, (n,)),
+              ("action", np.int8, (n,)), ("stats", np.int32, (n, len(STAT_FIELDS)))]
+    offset, out = 0, []
+    for name, dtype, shape in fields:
+        out.append((name, dtype, shape, offset))
+        offset += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 8) * 8
+    return out, offset
+
+
+def _views(buf, n):
+    return {name: np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+            for name, dtype, shape, offset in _layout(n)[0]}
+
+
+def _worker(conn, shm_name, n, lo, hi, levels, max_ticks):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arr = _views(shm.buf, n)
+    envs = [Env(levels[i % len(levels)], max_ticks) for i in range(lo, hi)]
+    obs, reward, done, action, stats = arr["obs"], arr["reward"], arr["done"], arr["action"], arr["stats"]
+    try:
+        while True:
+            cmd = conn.recv()
+            if cmd == "step":
+                for k, env in enumerate(envs):
+                    i = lo + k
+                    _, r, d, info = env.step(int(action[i]), obs[i])
+                    reward[i], done[i] = r, d
+                    stats[i] = [info[f] for f in STAT_FIELDS]
+                    # Hết episode: bắt đầu lại ngay, hàng obs là observation đầu của episode mới
+                    if d: env.reset(out=obs[i])
+            elif cmd == "reset":
+                for k, env in enumerate(envs):
+                    env.reset(out=obs[lo + k])
+                reward[lo:hi], done[lo:hi], stats[lo:hi] = 0, 0, 0
+            else:
+                break
+            conn.send(True)
+    finally:
+        del obs, reward, done, action, stats, arr
+        shm.close()
+        conn.close()
+
+
+class VectorEnv:
+    def __init__(self, num_envs, levels=(1,), workers=None, max_ticks=MAX_TICKS, context=None):
+        self.num_envs = num_envs
+        workers = min(workers or os.cpu_count() or 1, num_envs)
+        self.shm = shared_memory.SharedMemory(create=True, size=_layout(num_envs)[1])
+        self.arrays = _views(self.shm.buf, num_envs)
+
+        # Chia đều env cho các worker: worker k giữ hàng [lo, hi)
+        ctx = mp.get_context(context)
+        self.conns, self.procs = [], []
+        bounds = [num_envs * k // workers for k in range(workers + 1)]
+        for lo, hi in zip(bounds, bounds[1:]):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, daemon=True,
+                               args=(child, self.shm.name, num_envs, lo, hi, list(levels), max_ticks))
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+        self.closed = False
+
+    def _broadcast(self, cmd):
+        for c in self.conns: c.send(cmd)
+        for c in self.conns: c.recv()
+
+    def reset(self):
+        self._broadcast("reset")
+        return self.arrays["obs"].copy()
+
+    def step(self, actions):
+        # actions: N chỉ số hành động. Trả (obs, rewards, dones, infos), infos là dict các mảng
+        self.arrays["action"][:] = actions
+        self._broadcast("step")
+        a = self.arrays
+        infos = {f: a["stats"][:, k].copy() for k, f in enumerate(STAT_FIELDS)}
+        return a["obs"].copy(), a["reward"].copy(), a["done"].astype(bool), infos
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        for c in self.conns:
+            try:
+                c.send("close")
+            except (BrokenPipeError, OSError):
+                pass
+        for p in self.procs: p.join(timeout=5)
+        self.arrays = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def bench_env(levels, steps):
+    rng = np.random.default_rng(0)
+    env = Env(levels[0])
+    env.reset()
+    acts = rng.integers(0, len(ACTIONS), steps)
+    start = time.perf_counter()
+    for a in acts:
+        if env.step(int(a))[2]: env.reset()
+    return steps / (time.perf_counter() - start)
+
+
+def bench_vector(num_envs, workers, levels, steps):
+    rng = np.random.default_rng(0)
+    with VectorEnv(num_envs, levels, workers) as venv:
+        venv.reset()
+        rounds = max(steps // num_envs, 1)
+        acts = rng.integers(0, len(ACTIONS), (rounds, num_envs))
+        start = time.perf_counter()
+        for a in acts:
+            venv.step(a)
+        return rounds * num_envs / (time.perf_counter() - start)
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Env / VectorEnv throughput with random actions")
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1])
+    args = parser.parse_args(argv)
+
+    print(f"Env:       {bench_env(args.levels, args.steps):,.0f} bước/giây (1 process)")
+    rate = bench_vector(args.envs, args.workers, args.levels, args.steps)
+    print(f"VectorEnv: {rate:,.0f} bước/giây ({args.envs} env, {min(args.workers, args.envs)} worker)")
+
+
+if __name__ == "__main__":
+    main_cli()
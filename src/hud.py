@@ -0,0 +1,63 @@
+# hud.py – Lớp HUD / overlay dựng một lần rồi giữ lại, chỉ dựng lại phần có input đổi
+import pygame
+
+from profiler import PROFILER
+
+HEART_SPACING = 30
+
+
+def draw_heart(surface, x, y, color):
+    pygame.draw.circle(surface, (50, 0, 0), (x - 5, y - 4), 8)
+    pygame.draw.circle(surface, (50, 0, 0), (x + 5, y - 4), 8)
+    points_shadow = [(x - 12, y - 1), (x + 12, y - 1), (x, y + 13)]
+    pygame.draw.polygon(surface, (50, 0, 0), points_shadow)
+
+    pygame.draw.circle(surface, color, (x - 5, y - 5), 7)
+    pygame.draw.circle(surface, color, (x + 5, y - 5), 7)
+    points = [(x - 12, y - 2), (x + 12, y - 2), (x, y + 12)]
+    pygame.draw.polygon(surface, color, points)
+    pygame.draw.circle(surface, (255, 200, 200), (x - 7, y - 7), 2)
+
+
+class HudCompositor:
+    def __init__(self, size):
+        self.size = size
+        self.layers = {}
+        self._hearts = (None, None)  # (khóa lives/màu, Surface)
+
+    def overlay(self, alpha):
+        key = ("overlay", alpha)
+        surf = self.layers.get(key)
+        if surf is None:
+            surf = self.layers[key] = pygame.Surface(self.size, pygame.SRCALPHA)
+            surf.fill((0, 0, 0, alpha))
+            PROFILER.count("surfaces")
+        return surf
+
+    def panel(self, size, fill=None, rounded=None, border=None, radius=0):
+        # fill: phủ cả khung; rounded: nền bo góc; border: viền 2px
+        key = ("panel", size, fill, rounded, border, radius)
+        surf = self.layers.get(key)
+        if surf is None:
+            surf = self.layers[key] = pygame.Surface(size, pygame.SRCALPHA)
+            if fill: surf.fill(fill)
+            if rounded: pygame.draw.rect(surf, rounded, surf.get_rect(), border_radius=radius)
+            if border: pygame.draw.rect(surf, border, surf.get_rect(), width=2, border_radius=radius)
+            PROFILER.count("surfaces")
+        return surf
+
+    def hearts(self, lives, color):
+        # Một Surface cho cả hàng tim, dựng lại khi số mạng đổi
+        key, surf = self._hearts
+        if key != (lives, color):
+            surf = pygame.Surface((max(lives, 0) * HEART_SPACING, HEART_SPACING), pygame.SRCALPHA)
+            for i in range(lives):
+                draw_heart(surf, 15 + i * HEART_SPACING, 15, color)
+            self._hearts = ((lives, color), surf)
+            PROFILER.count("surfaces")
+        return surf
+
+    def blit_hearts(self, screen, lives, x, y, color=(230, 50, 50)):
+        # (x, y) là tâm trái tim đầu tiên, giống draw_heart
+        screen.blit(self.hearts(lives, color), (x - 15, y - 15))
+        PROFILER.count("blits")
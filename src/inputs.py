@@ -0,0 +1,26 @@
+# inputs.py – Trạng thái phím của một tick (trái / phải / nhảy)
+from collections import namedtuple
+
+import pygame
+
+Inputs = namedtuple("Inputs", "left right jump")
+NO_INPUT = Inputs(False, False, False)
+
+# Mã hoá gọn thành 1 byte (dùng cho replay)
+LEFT, RIGHT, JUMP = 1, 2, 4
+
+
+def read_keyboard():
+    keys = pygame.key.get_pressed()
+    # --- HỖ TRỢ CẢ MŨI TÊN VÀ WASD ---
+    return Inputs(left=bool(keys[pygame.K_LEFT] or keys[pygame.K_a]),
+                  right=bool(keys[pygame.K_RIGHT] or keys[pygame.K_d]),
+                  jump=bool(keys[pygame.K_SPACE] or keys[pygame.K_w]))
+
+
+def pack_inputs(inputs):
+    return (LEFT if inputs.left else 0) | (RIGHT if inputs.right else 0) | (JUMP if inputs.jump else 0)
+
+
+def unpack_inputs(bits):
+    return Inputs(bool(bits & LEFT), bool(bits & RIGHT), bool(bits & JUMP))
@@ -1,18 +1,21 @@
 import pygame
 
+from animation import Clip, FacingFrames
+
 class Coin:
-    def __init__(self, x, y, images):
-        self.images = images
-        self.frame = 0
+    def __init__(self, x, y, clip):
+        # clip: Clip dùng chung cho mọi coin (list ảnh kiểu cũ vẫn nhận, 6 frame/giây)
+        self.clip = clip if isinstance(clip, Clip) else Clip(FacingFrames(clip, clip), 6)
+        self.elapsed = 0
         self.rect = pygame.Rect(x, y, 32, 32)
         self.collected = False
 
     def update(self, dt):
-        self.frame = (self.frame + 0.1) % len(self.images)
+        self.elapsed += dt  # dt tính bằng ms
 
     def draw(self, surf):
         if not self.collected:
-            surf.blit(self.images[int(self.frame)], self.rect.topleft)
+            surf.blit(self.clip.image(self.elapsed), self.rect.topleft)
 
 class Spike:
     def __init__(self, x, y, image):
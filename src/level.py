@@ -1,25 +1,21 @@
 import os
 import pygame
 
+from tile_cache import StaticLayerCache
+from spatial import ColumnIndex
+from assets import ASSETS
+from triggers import TriggerLayer, PIT, COIN, GOAL
+
 class Level:
     def __init__(self, parsed_data, level_index):
         self.level_index = level_index
-        self.tile_size = parsed_data["tile_size"]
-
-        # Danh sách các thành phần của map
-        self.platforms = parsed_data.get("platform_list", [])
-        self.stone_list = parsed_data.get("stone_list", [])
-        self.pits = parsed_data.get("pit_list", [])
-        self.coins = parsed_data.get("coin_list", [])
-        self.enemies = parsed_data.get("enemy_list", [])
-        self.spawn_point = parsed_data.get("spawn_point")
-        self.goal_rect = parsed_data.get("goal_rect")
-        self.raw_tiles = parsed_data.get("raw_tiles", [])
+        # parsed_data là LevelGrid (map_loader.parse_level)
+        self.grid = parsed_data
+        self.tile_size = parsed_data.tile_size
 
-        self.all_solids = self.platforms + self.stone_list
-
-        self.ground_top = []
-        self.ground_center = []
+        self.spawn_point = parsed_data.spawn
+        self.goal_rect = parsed_data.goal
+        self.solid_grid = parsed_data.solid_grid
 
         self.offset_x = 0
 
@@ -29,14 +25,10 @@ class Level:
 
         def try_load(name, size=None):
             path = os.path.join(assets_dir, name)
-            try:
-                img = pygame.image.load(path).convert_alpha()
-                if size:
-                    img = pygame.transform.scale(img, size)
-                return img
-            except:
+            img = ASSETS.image(path, size)
+            if img is None:
                 print(f"[Warning] Không tìm thấy: {path}")
-                return None
+            return img
 
         ts = self.tile_size
 
@@ -50,51 +42,77 @@ class Level:
         bg_name = f"background_{self.level_index}.png"
         self.img_bg = try_load(bg_name, (800, 380))
 
-        # Phân loại mặt đất
-        self._classify_ground_tiles()
+        # Pit / ground / stone không đổi -> nướng sẵn thành chunk
+        self.static_layer = StaticLayerCache(self.grid, {
+            "pit": (self.img_pit, (0, 0, 0)),
+            "top": (self.img_ground_top, (100, 180, 60)),
+            "cen": (self.img_ground_center, (120, 70, 20)),
+            "stone": (self.img_stone, (140, 140, 140)),
+        })
+
+        # Tile đổi (LevelGrid.set_tile): nướng lại chunk, bỏ Rect va chạm cũ
+        parsed_data.add_listener(self.static_layer.invalidate_cell)
+        parsed_data.add_listener(self.solid_grid.invalidate_cell)
+
+        # Hố / coin / đích theo cột tile; enemy theo chỉ mục cột, draw chỉ hỏi các cột trong camera
+        self.triggers = TriggerLayer(parsed_data, pit_inset=0, coin_size=ts // 2)
+        self.enemy_index = ColumnIndex(ts)
+        for ex, ey in self.enemies:
+            self.enemy_index.add((ex, ey), pygame.Rect(ex, ey, ts, ts))
 
-    # Phân tách ground
-    def _classify_ground_tiles(self):
-        ts = self.tile_size
-        platform_positions = {(r.x, r.y) for r in self.platforms}
+    # Danh sách Rect lấy lười từ LevelGrid
+    @property
+    def platforms(self):
+        return self.grid.platforms
+
+    @property
+    def stone_list(self):
+        return self.grid.stones
+
+    @property
+    def pits(self):
+        return self.grid.pits
 
-        self.ground_top = []
-        self.ground_center = []
+    @property
+    def coins(self):
+        return self.grid.coins
 
-        for r in self.platforms:
-            above_pos = (r.x, r.y - ts)
-            if above_pos in platform_positions:
-                self.ground_center.append(r)
-            else:
-                self.ground_top.append(r)
+    @property
+    def enemies(self):
+        return self.grid.enemies
+
+    @property
+    def raw_tiles(self):
+        return self.grid.rows
+
+    @property
+    def all_solids(self):
+        # Khối rắn đã gộp (ít Rect hơn nhiều so với từng ô '#' / 'S')
+        return self.solid_grid.solid_rects()
+
+    # Phân tách ground (LevelGrid tự phân loại khi cần)
+    @property
+    def ground_top(self):
+        return self.grid.ground_top
+
+    @property
+    def ground_center(self):
+        return self.grid.ground_center
 
     # UPDATE
     def update(self, player):
         # 1. Player rơi vào hố
-        for pit in self.pits:
-            if player.rect.colliderect(pit):
-                player.on_death()
-                return
+        if self.triggers.hits(player.rect, PIT):
+            player.on_death()
+            return
 
         # 2. Coin pickup
-        collected = []
-        for cx, cy in self.coins:
-            coin_rect = pygame.Rect(
-                cx - self.tile_size // 4,
-                cy - self.tile_size // 4,
-                self.tile_size // 2,
-                self.tile_size // 2
-            )
-            if player.rect.colliderect(coin_rect):
-                collected.append((cx, cy))
-
-        for c in collected:
-            if c in self.coins:
-                self.coins.remove(c)
+        for c in self.triggers.hits(player.rect, COIN):
+            if self.triggers.collect(c):
                 player.coins += 1
 
         # 3. Goal
-        if self.goal_rect and player.rect.colliderect(self.goal_rect):
+        if self.triggers.hits(player.rect, GOAL):
             player.on_reach_goal()
 
     # DRAW
@@ -108,40 +126,16 @@ class Level:
         else:
             screen.fill((120, 190, 255))
 
-        # PITS
-        for r in self.pits:
-            if self.img_pit:
-                screen.blit(self.img_pit, (r.x - ox, r.y))
-            else:
-                pygame.draw.rect(screen, (0, 0, 0), pygame.Rect(r.x - ox, r.y, r.width, r.height))
-
-        # GROUND TOP
-        for r in self.ground_top:
-            if self.img_ground_top:
-                screen.blit(self.img_ground_top, (r.x - ox, r.y))
-            else:
-                pygame.draw.rect(screen, (100, 180, 60), pygame.Rect(r.x - ox, r.y, r.width, r.height))
-
-        # GROUND CENTER
-        for r in self.ground_center:
-            if self.img_ground_center:
-                screen.blit(self.img_ground_center, (r.x - ox, r.y))
-            else:
-                pygame.draw.rect(screen, (120, 70, 20), pygame.Rect(r.x - ox, r.y, r.width, r.height))
-
-        # STONE
-        for r in self.stone_list:
-            if self.img_stone:
-                screen.blit(self.img_stone, (r.x - ox, r.y))
-            else:
-                pygame.draw.rect(screen, (140, 140, 140), pygame.Rect(r.x - ox, r.y, r.width, r.height))
-
-        # COINS
-        for cx, cy in self.coins:
+        # PITS / GROUND TOP / GROUND CENTER / STONE (chunk nướng sẵn)
+        self.static_layer.draw(screen, ox, screen.get_width())
+
+        # COINS (chỉ những coin trong camera)
+        view_w = screen.get_width()
+        for cx, cy in self.triggers.visible(COIN, ox, ox + view_w, pad=ts // 4):
             pygame.draw.circle(screen, (255, 215, 0), (int(cx - ox), int(cy)), ts // 4)
 
         # ENEMIES
-        for ex, ey in self.enemies:
+        for ex, ey in self.enemy_index.query(ox, ox + view_w):
             pygame.draw.rect(screen, (200, 40, 40), pygame.Rect(ex - ox, ey, ts, ts))
 
         # SPAWN
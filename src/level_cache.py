@@ -0,0 +1,126 @@
+# level_cache.py – Biên dịch level JSON thành file nhị phân đặt cạnh file JSON (levelN.lvlc)
+# Cache hợp lệ khi mtime + kích thước file nguồn khớp, hoặc khi hash nội dung vẫn khớp.
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from array import array
+
+import pygame
+
+from level_grid import LevelGrid
+
+MAGIC = b"LVLC"
+VERSION = 2
+# magic, version, mtime_ns nguồn, size nguồn, sha1 nguồn, tile_size, width, height,
+# số coin, số enemy, số khối rắn đã gộp, có spawn?, spawn x/y, có goal?, goal x/y/w/h
+HEADER = struct.Struct("<4sHqQ20sHII III B ii B iiii")
+BLOCK_INTS = 6  # c0, r0, c1, r1, mã tile, ground kind
+
+
+def cache_path(json_path):
+    return os.path.splitext(json_path)[0] + ".lvlc"
+
+
+def _parse_source(raw, tile_size_default=32):
+    data = json.loads(raw.decode("utf-8-sig"))
+    return LevelGrid.from_rows(data.get("tiles", []), data.get("tile_size", tile_size_default))
+
+
+def _pack(grid, stat, digest):
+    coins = array("i", [v for c in grid.coins for v in c])
+    enemies = array("i", [v for e in grid.enemies for v in e])
+    blocks = array("i", [v for b in grid.solid_blocks for v in b])
+    spawn, goal = grid.spawn, grid.goal
+    header = HEADER.pack(
+        MAGIC, VERSION, stat.st_mtime_ns, stat.st_size, digest,
+        grid.tile_size, grid.width, grid.height,
+        len(grid.coins), len(grid.enemies), len(grid.solid_blocks),
+        spawn is not None, *(spawn or (0, 0)),
+        goal is not None, *((goal.x, goal.y, goal.w, goal.h) if goal else (0, 0, 0, 0)),
+    )
+    return b"".join((header, grid.codes, grid.ground, coins.tobytes(), enemies.tobytes(), blocks.tobytes()))
+
+
+def _unpack(raw):
+    if raw[:4] != MAGIC or struct.unpack_from("<H", raw, 4)[0] != VERSION: return None
+    (magic, version, mtime_ns, size, digest, ts, w, h, n_coins, n_enemies, n_blocks,
+     has_spawn, sx, sy, has_goal, gx, gy, gw, gh) = HEADER.unpack_from(raw, 0)
+    if len(raw) != HEADER.size + 2 * w * h + 8 * (n_coins + n_enemies) + 4 * BLOCK_INTS * n_blocks: return None
+
+    # Một lần đọc, cắt các lớp bằng memoryview – không có vòng lặp theo tile
+    view = memoryview(raw)
+    pos = HEADER.size
+    grid = LevelGrid(bytearray(view[pos:pos + w * h]), w, h, ts)
+    pos += w * h
+    grid.ground = bytearray(view[pos:pos + w * h])
+    pos += w * h
+    coins = array("i"); coins.frombytes(view[pos:pos + n_coins * 8])
+    pos += n_coins * 8
+    enemies = array("i"); enemies.frombytes(view[pos:pos + n_enemies * 8])
+    pos += n_enemies * 8
+    blocks = array("i"); blocks.frombytes(view[pos:pos + n_blocks * 4 * BLOCK_INTS])
+
+    grid.coins = list(zip(coins[0::2], coins[1::2]))
+    grid.enemies = list(zip(enemies[0::2], enemies[1::2]))
+    grid.solid_blocks = list(zip(*(blocks[k::BLOCK_INTS] for k in range(BLOCK_INTS))))
+    grid.spawn = (sx, sy) if has_spawn else None
+    grid.goal = pygame.Rect(gx, gy, gw, gh) if has_goal else None
+    return grid, (mtime_ns, size, digest)
+
+
+def _write_cache(path, data):
+    # Ghi file tạm riêng (tên ngẫu nhiên) cùng thư mục rồi os.replace: thread nạp trước và các process
+    # của VectorEnv có thể biên dịch cùng một level một lúc, người đọc không bao giờ thấy file ghi dở
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+
+def compile_level(json_path):
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    stat = os.stat(json_path)
+    grid = _parse_source(raw)
+    try:
+        _write_cache(cache_path(json_path), _pack(grid, stat, hashlib.sha1(raw).digest()))
+    except OSError as e:
+        print(f"[Warning] Không ghi được cache level: {e}")
+    return grid
+
+
+def load_level_grid(json_path):
+    # Trả LevelGrid từ cache nếu còn hợp lệ, ngược lại biên dịch lại từ JSON
+    stat = os.stat(json_path)
+    try:
+        with open(cache_path(json_path), "rb") as f:
+            raw = f.read()
+    except OSError:
+        return compile_level(json_path)
+
+    try:
+        unpacked = _unpack(raw)
+    except (struct.error, ValueError):
+        unpacked = None
+    if unpacked is None:
+        return compile_level(json_path)
+    grid, (mtime_ns, size, digest) = unpacked
+    if mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+        return grid
+
+    # mtime đổi (copy / checkout) nhưng nội dung có thể vẫn vậy
+    with open(json_path, "rb") as f:
+        source = f.read()
+    if hashlib.sha1(source).digest() == digest:
+        try:
+            _write_cache(cache_path(json_path), _pack(grid, os.stat(json_path), digest))
+        except OSError: pass
+        return grid
+    return compile_level(json_path)
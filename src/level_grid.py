@@ -0,0 +1,176 @@
+# level_grid.py – Map lưu dạng một mảng byte liền mạch (mỗi ô một mã tile, theo hàng)
+from functools import cached_property
+
+import pygame
+
+from collision import SolidGrid, merge_cells
+
+EMPTY = ord('.')
+PLATFORM = ord('#')
+STONE = ord('S')
+PIT = ord('_')
+COIN = ord('C')
+ENEMY = ord('E')
+SPAWN = ord('P')
+GOAL = ord('G')
+
+# Lớp phân loại mặt đất (một byte mỗi ô)
+GROUND_NONE = 0
+GROUND_TOP = 1
+GROUND_CENTER = 2
+
+# Tên khóa kiểu dict cũ (main.load_level_data và map_loader.parse_level) -> thuộc tính
+LEGACY_KEYS = {
+    "platforms": "platforms", "platform_list": "platforms",
+    "stones": "stones", "stone_list": "stones",
+    "pits": "pits", "pit_list": "pits",
+    "coins": "coins", "coin_list": "coins",
+    "enemies": "enemies", "enemy_list": "enemies",
+    "spawn": "spawn", "spawn_point": "spawn",
+    "goal": "goal", "goal_rect": "goal",
+    "raw_tiles": "rows",
+    "tile_size": "tile_size", "width": "width", "height": "height",
+    "solid_grid": "solid_grid",
+}
+
+
+class LevelGrid:
+    def __init__(self, codes, width, height, tile_size):
+        self.codes = codes
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.listeners = []  # fn(col, row) gọi sau mỗi lần set_tile
+
+    @classmethod
+    def from_rows(cls, rows, tile_size, fill='.'):
+        width = max((len(r) for r in rows), default=0)
+        text = "".join(r.ljust(width, fill) for r in rows)
+        codes = bytearray(text.encode("ascii", "replace"))
+        return cls(codes, width, len(rows), tile_size)
+
+    # --- Truy vấn O(1) ---
+    def tile_at(self, col, row):
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.codes[row * self.width + col]
+        return EMPTY
+
+    def set_tile(self, col, row, code):
+        # Đổi một ô (vd. BreakBlock vỡ): bỏ các danh sách dựng lười theo tile rồi báo listener
+        # (chunk tile, lưới va chạm, đoạn đi tuần enemy...). Coin / enemy / spawn / goal giữ nguyên.
+        if not (0 <= col < self.width and 0 <= row < self.height): return False
+        i = row * self.width + col
+        if self.codes[i] == code: return False
+        self.codes[i] = code
+        for name in ("platforms", "stones", "pits", "rows", "ground", "ground_top", "ground_center", "solid_blocks"):
+            self.__dict__.pop(name, None)
+        for fn in self.listeners:
+            fn(col, row)
+        return True
+
+    def add_listener(self, fn):
+        self.listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self.listeners: self.listeners.remove(fn)
+
+    def rect(self, col, row):
+        ts = self.tile_size
+        return pygame.Rect(col * ts, row * ts, ts, ts)
+
+    def cells(self, code):
+        # Duyệt (col, row) của mọi ô mang mã code, bytearray.find chạy ở tầng C
+        find = self.codes.find
+        w = self.width
+        i = find(code)
+        while i != -1:
+            yield i % w, i // w
+            i = find(code, i + 1)
+
+    def count(self, code):
+        return self.codes.count(code)
+
+    def _last_cell(self, code):
+        i = self.codes.rfind(code)
+        if i == -1: return None
+        return i % self.width, i // self.width
+
+    # --- Danh sách dựng lười, chỉ khi được hỏi ---
+    @cached_property
+    def platforms(self):
+        return [self.rect(x, y) for x, y in self.cells(PLATFORM)]
+
+    @cached_property
+    def stones(self):
+        return [self.rect(x, y) for x, y in self.cells(STONE)]
+
+    @cached_property
+    def pits(self):
+        return [self.rect(x, y) for x, y in self.cells(PIT)]
+
+    @cached_property
+    def coins(self):
+        ts = self.tile_size
+        return [(x * ts + ts // 2, y * ts + ts // 2) for x, y in self.cells(COIN)]
+
+    @cached_property
+    def enemies(self):
+        ts = self.tile_size
+        return [(x * ts, y * ts) for x, y in self.cells(ENEMY)]
+
+    @cached_property
+    def spawn(self):
+        cell = self._last_cell(SPAWN)
+        if cell is None: return None
+        return cell[0] * self.tile_size, cell[1] * self.tile_size
+
+    @cached_property
+    def goal(self):
+        cell = self._last_cell(GOAL)
+        return self.rect(*cell) if cell else None
+
+    @cached_property
+    def rows(self):
+        w = self.width
+        return [self.codes[y * w:(y + 1) * w].decode("ascii") for y in range(self.height)]
+
+    @cached_property
+    def ground(self):
+        # '#' có '#' ngay phía trên là ground_center, còn lại là ground_top
+        layer = bytearray(len(self.codes))
+        codes, w = self.codes, self.width
+        for x, y in self.cells(PLATFORM):
+            i = y * w + x
+            layer[i] = GROUND_CENTER if y > 0 and codes[i - w] == PLATFORM else GROUND_TOP
+        return layer
+
+    def ground_kind(self, col, row):
+        return self.ground[row * self.width + col]
+
+    @cached_property
+    def ground_top(self):
+        return [self.rect(x, y) for x, y in self.cells(PLATFORM) if self.ground_kind(x, y) == GROUND_TOP]
+
+    @cached_property
+    def ground_center(self):
+        return [self.rect(x, y) for x, y in self.cells(PLATFORM) if self.ground_kind(x, y) == GROUND_CENTER]
+
+    @cached_property
+    def solid_blocks(self):
+        # Ô rắn gộp thành khối chữ nhật (cache level lưu sẵn danh sách này)
+        return merge_cells(self)
+
+    @cached_property
+    def solid_grid(self):
+        return SolidGrid(self, blocks=self.solid_blocks)
+
+    # --- Tương thích với level_data kiểu dict cũ ---
+    def __getitem__(self, key):
+        return getattr(self, LEGACY_KEYS[key])
+
+    def __setitem__(self, key, value):
+        setattr(self, LEGACY_KEYS[key], value)
+
+    def get(self, key, default=None):
+        if key not in LEGACY_KEYS: return default
+        return self[key]
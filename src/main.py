@@ -1,24 +1,41 @@
+from profiler import STARTUP, PROFILER
 import pygame
 import sys
 import os
-import json
+import time
 import traceback
 from pathlib import Path
-
-pygame.init()
+from level_cache import load_level_grid
+from tile_cache import StaticLayerCache
+from triggers import TriggerLayer, PIT, COIN, GOAL
+from inputs import NO_INPUT, read_keyboard
+from replay import Replay
+from assets import ASSETS
+from animation import FacingFrames, Clip, Cursor, get_clip
+from text import TEXT
+from hud import HudCompositor
+from persistence import JsonStore
+from preload import LevelPreloader
+from audio import AudioEngine
+from enemy import EnemySystem
+from functools import cached_property
 
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 380
 FPS = 60
+STEP_MS = 1000 / FPS
+MAX_STEPS_PER_FRAME = 5   # tụt FPS quá nặng thì chậm lại thay vì đuổi theo mãi
+STEP_SLACK_MS = 2         # Clock.tick làm tròn ms: frame 16 ms vẫn tính là một tick
 
-# Font chữ
-FONT_BTN = pygame.font.SysFont("Berlin Sans FB Demi", 22)
-if not pygame.font.get_fonts():
-    FONT_BTN = pygame.font.SysFont("arial", 22, bold=True)
-    
-FONT_TITLE = pygame.font.SysFont("Berlin Sans FB Demi", 60)
-if not pygame.font.get_fonts():
-    FONT_TITLE = pygame.font.SysFont("arial", 60, bold=True)
+# Tốc độ animation (frame/giây), bằng tốc độ cũ 0.2 / 0.15 / 0.1 frame mỗi tick ở 60 FPS
+PLAYER_ANIM_FPS = 12
+COIN_ANIM_FPS = 9
+ENEMY_ANIM_FPS = 6
+
+# Font chữ: (tên, cỡ, đậm, fallback) – TEXT chỉ tạo font khi vẽ lần đầu
+FONT_BTN = ("Berlin Sans FB Demi", 22, False, ("arial", 22, True))
+FONT_TITLE = ("Berlin Sans FB Demi", 60, False, ("arial", 60, True))
+FONT_PROFILER = ("consolas", 14, False, ("arial", 14, False))
 
 # --- Hàm tìm đường dẫn ---
 def get_paths():
@@ -35,7 +52,9 @@ def get_paths():
         "characters": os.path.join(assets_dir, "characters"),
         "sounds": os.path.join(assets_dir, "sounds"),
         "ui": os.path.join(assets_dir, "ui"),
-        "shop_file": os.path.join(project_root, "shop_state.json")
+        "shop_file": os.path.join(project_root, "shop_state.json"),
+        "replays": os.path.join(project_root, "saves", "replays"),
+        "profiles": os.path.join(project_root, "saves", "profiles")
     }
 
 PATHS = get_paths()
@@ -44,6 +63,8 @@ PATHS = get_paths()
 class ShopManager:
     def __init__(self, save_file):
         self.save_file = Path(save_file)
+        # Ghi nền: nhặt coin không đụng tới đĩa trên thread game
+        self.store = JsonStore(self.save_file)
         self.all_skins = ["nhanvat1", "nhanvat2", "nhanvat3", "nhanvat4"]
         self.default_state = {
             "coins": 0,
@@ -56,21 +77,19 @@ class ShopManager:
 
     def load(self):
         if self.save_file.exists():
-            try:
-                with open(self.save_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    for key in self.default_state:
-                        if key not in data: data[key] = self.default_state[key]
-                    self.state = data
-            except: pass
+            data = self.store.load()
+            if isinstance(data, dict):
+                for key in self.default_state:
+                    if key not in data: data[key] = self.default_state[key]
+                self.state = data
         else:
             self.save()
 
     def save(self):
-        try:
-            with open(self.save_file, "w", encoding="utf-8") as f:
-                json.dump(self.state, f)
-        except: pass
+        self.store.mark_dirty(self.state)
+
+    def flush(self):
+        return self.store.flush()
 
     def add_coin(self, amount):
         self.state["coins"] += amount
@@ -94,63 +113,14 @@ class ShopManager:
             self.state["equipped_skin"] = skin_id
             self.save()
 
-# --- QUẢN LÝ ÂM THANH (ĐÃ NÂNG CẤP ĐỂ TỰ TÌM ĐUÔI FILE) ---
-class SoundManager:
-    def __init__(self):
-        self.sounds = {}
-        try:
-            pygame.mixer.pre_init(44100, -16, 2, 512)
-            pygame.mixer.init()
-            self._load("coin", "coin.wav")
-            self._load("hit", "hit.wav")
-            self._load("jump", "jump.wav")
-            self._load("gameover", "gameover.wav")
-        except: pass
-
-    def _load(self, name, filename):
-        path = os.path.join(PATHS["sounds"], filename)
-        if os.path.exists(path):
-            try:
-                self.sounds[name] = pygame.mixer.Sound(path)
-                if name == "coin": self.sounds[name].set_volume(0.2)
-            except: pass
-
-    def play(self, name):
-        if name in self.sounds:
-            self.sounds[name].play()
-
-    # --- HÀM PHÁT NHẠC THÔNG MINH (MỚI) ---
-    def play_bgm(self, filename_base):
-        extensions = [".mp3", ".wav", ".ogg"]
-        found_path = None
-        
-        # Nếu filename đã có đuôi thì dùng luôn
-        if "." in filename_base:
-            p = os.path.join(PATHS["sounds"], filename_base)
-            if os.path.exists(p): found_path = p
-        else:
-            # Nếu chưa có đuôi, thử từng loại
-            for ext in extensions:
-                p = os.path.join(PATHS["sounds"], filename_base + ext)
-                if os.path.exists(p):
-                    found_path = p
-                    break
-        
-        if found_path:
-            try:
-                pygame.mixer.music.load(found_path)
-                pygame.mixer.music.set_volume(0.2)
-                pygame.mixer.music.play(-1) # Lặp vô tận
-            except Exception as e:
-                print(f"Lỗi phát nhạc {found_path}: {e}")
-        else:
-            # Không tìm thấy nhạc thì thôi, không báo lỗi làm dừng game
-            print(f"Chưa có file nhạc cho: {filename_base}")
-    
-    def stop_bgm(self):
-        pygame.mixer.music.stop()
+# --- ÂM THANH: kênh riêng theo nhóm, mixer mở khi phát lần đầu (audio.py) ---
+SFX = AudioEngine(PATHS["sounds"])
 
-SFX = SoundManager()
+# Dùng cho chạy headless: không mixer, không phát gì
+class NullSound:
+    def play(self, name): pass
+    def play_bgm(self, filename_base): pass
+    def stop_bgm(self): pass
 
 # --- NÚT BẤM ---
 class Button:
@@ -196,13 +166,14 @@ class Button:
         
         current_font = FONT_BTN
         if self.text == "||":
-            current_font = pygame.font.SysFont("arial", 24, bold=True)
+            current_font = TEXT.font("arial", 24, bold=True)
         elif not self.use_image:
-            current_font = pygame.font.SysFont("Berlin Sans FB Demi", 32)
+            current_font = TEXT.font("Berlin Sans FB Demi", 32)
 
-        txt_surf = current_font.render(self.text, True, txt_col)
+        txt_surf = TEXT.render(current_font, self.text, txt_col)
         txt_rect = txt_surf.get_rect(center=self.rect.center)
         surf.blit(txt_surf, txt_rect)
+        PROFILER.count("blits", 2 if self.use_image else 1)
 
     def handle_event(self, event):
         if self.is_locked: return
@@ -212,73 +183,8 @@ class Button:
             if self.rect.collidepoint(event.pos):
                 if self.callback: self.callback()
 
-# --- SPRITESHEET HELPER ---
-class SpriteSheet:
-    def __init__(self, image):
-        self.sheet = image
-
-    def get_image(self, frame, width, height, scale, color=(0, 0, 0)):
-        image = pygame.Surface((width, height)).convert_alpha()
-        image.fill((0,0,0,0))
-        image.blit(self.sheet, (0, 0), ((frame * width), 0, width, height))
-        image = pygame.transform.scale(image, (width * scale, height * scale))
-        image.set_colorkey(color)
-        return image
-
-def draw_heart(surface, x, y, color):
-    pygame.draw.circle(surface, (50, 0, 0), (x - 5, y - 4), 8)
-    pygame.draw.circle(surface, (50, 0, 0), (x + 5, y - 4), 8)
-    points_shadow = [(x - 12, y - 1), (x + 12, y - 1), (x, y + 13)]
-    pygame.draw.polygon(surface, (50, 0, 0), points_shadow)
-
-    pygame.draw.circle(surface, color, (x - 5, y - 5), 7)
-    pygame.draw.circle(surface, color, (x + 5, y - 5), 7)
-    points = [(x - 12, y - 2), (x + 12, y - 2), (x, y + 12)]
-    pygame.draw.polygon(surface, color, points)
-    pygame.draw.circle(surface, (255, 200, 200), (x - 7, y - 7), 2)
-
-
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y, img_list):
-        super().__init__()
-        self.image = img_list[0] if img_list else pygame.Surface((32,32))
-        self.rect = self.image.get_rect(topleft=(x,y))
-        self.speed = 1
-        self.direction = 1 
-        self.img_list = img_list
-        self.frame_index = 0
-        self.animation_speed = 0.1
-
-    def update(self, platforms):
-        self.rect.x += self.speed * self.direction
-        if self.img_list:
-            self.frame_index = (self.frame_index + self.animation_speed) % len(self.img_list)
-            self.image = self.img_list[int(self.frame_index)]
-            if self.direction == -1:
-                self.image = pygame.transform.flip(self.img_list[int(self.frame_index)], True, False)
-
-        turn_around = False
-        for p in platforms:
-            if self.rect.colliderect(p): turn_around = True
-        
-        look_ahead_x = self.rect.right if self.direction == 1 else self.rect.left - 5
-        look_ahead = pygame.Rect(look_ahead_x, self.rect.bottom + 5, 5, 5)
-        on_ground = False
-        for p in platforms:
-            if look_ahead.colliderect(p):
-                on_ground = True
-                break
-        if not on_ground: turn_around = True
-
-        if turn_around:
-            self.rect.x -= self.speed * self.direction 
-            self.direction *= -1
-
-    def draw(self, screen, offset_x):
-        screen.blit(self.image, (self.rect.x - offset_x, self.rect.y))
-
 class Player:
-    def __init__(self, spawn, skin_name, shop):
+    def __init__(self, spawn, skin_name, shop, clock=None, sfx=None):
         self.rect = pygame.Rect(spawn[0], spawn[1], 20, 30)
         self.spawn = spawn
         self.vel_x = 0
@@ -291,64 +197,66 @@ class Player:
         self.invincible = False
         self.invincible_timer = 0
         self.shop = shop
+        self.coins = 0
+        # clock trả về ms (mặc định đồng hồ thật), sfx có thể là NullSound khi headless
+        self.clock = clock or pygame.time.get_ticks
+        self.sfx = sfx or SFX
         
-        self.animations = {"idle": [], "run": []}
-        self.frame_index = 0
+        self.clips = {}
         self.action = "idle"
         self.load_skin(skin_name)
+        self.anim = Cursor(self.clips["idle"], self.clock())
 
     def load_skin(self, skin_name):
-        folder = os.path.join(PATHS["characters"], skin_name)
+        # skin_name=None (headless): không đọc ảnh, dùng khối màu dự phòng
+        folder = os.path.join(PATHS["characters"], skin_name) if skin_name else None
         def load_sheet(action, count):
+            if folder is None: return None
+            # Frame cắt sẵn (cả bản lật) được chia sẻ qua ASSETS, đổi skin / chơi lại không đọc đĩa
             path = os.path.join(folder, f"{action} (32x32).png")
-            frames = []
-            if os.path.exists(path):
-                try:
-                    img = pygame.image.load(path).convert_alpha()
-                    sheet = SpriteSheet(img)
-                    for i in range(count):
-                        frames.append(sheet.get_image(i, 32, 32, 1.5))
-                except: pass
-            return frames
-
-        self.animations["idle"] = load_sheet("Idle", 11)
-        self.animations["run"] = load_sheet("Run", 12)
-        
-        if not self.animations["idle"]:
-            surf = pygame.Surface((48, 48))
-            surf.fill((0, 0, 255))
-            self.animations["idle"] = [surf]
-            self.animations["run"] = [surf]
-
-    def update(self, level_data):
+            frames = FacingFrames(ASSETS.sheet_frames(path, count, 32, 32, 1.5),
+                                  ASSETS.sheet_frames(path, count, 32, 32, 1.5, flip=True))
+            return Clip(frames, PLAYER_ANIM_FPS) if frames else None
+
+        # Clip dùng chung cho mọi Player cùng skin
+        idle = get_clip(("player", skin_name, "idle"), lambda: load_sheet("Idle", 11))
+        run = get_clip(("player", skin_name, "run"), lambda: load_sheet("Run", 12))
+        
+        if not idle:
+            def fallback():
+                surf = pygame.Surface((48, 48))
+                surf.fill((0, 0, 255))
+                return Clip([surf], PLAYER_ANIM_FPS)
+            idle = get_clip(("player", None, "fallback"), fallback)
+        self.clips = {"idle": idle, "run": run or idle}
+
+    def update(self, level_data, inputs=None):
         if self.dead or self.win: return
         if self.invincible:
-            if pygame.time.get_ticks() - self.invincible_timer > 2000:
+            if self.clock() - self.invincible_timer > 2000:
                 self.invincible = False
 
-        keys = pygame.key.get_pressed()
+        if inputs is None: inputs = read_keyboard()
         self.vel_x = 0
         
-        # --- HỖ TRỢ CẢ MŨI TÊN VÀ WASD ---
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]: 
+        if inputs.left: 
             self.vel_x = -4
             self.facing_right = False
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]: 
+        if inputs.right: 
             self.vel_x = 4
             self.facing_right = True
         
         # Nhảy bằng SPACE hoặc W
-        if (keys[pygame.K_SPACE] or keys[pygame.K_w]) and self.on_ground:
+        if inputs.jump and self.on_ground:
             self.vel_y = -13
             self.on_ground = False
-            SFX.play("jump")
+            self.sfx.play("jump")
 
         new_action = "run" if self.vel_x != 0 else "idle"
         if new_action != self.action:
             self.action = new_action
-            self.frame_index = 0
+            self.anim.play(self.clips[new_action], self.clock())
         
-        self.frame_index = (self.frame_index + 0.2) % len(self.animations[self.action])
         self.vel_y = min(self.vel_y + 0.6, 20)
 
         # Collision X
@@ -359,8 +267,8 @@ class Player:
         if self.rect.left < 0: self.rect.left = 0
         if self.rect.right > map_width: self.rect.right = map_width
         
-        solids = level_data["platforms"] + level_data["stones"]
-        for p in solids:
+        grid = level_data["solid_grid"]
+        for p in grid.query(self.rect):
             if self.rect.colliderect(p):
                 if self.vel_x > 0: self.rect.right = p.left
                 elif self.vel_x < 0: self.rect.left = p.right
@@ -368,7 +276,7 @@ class Player:
         # Collision Y
         self.rect.y += self.vel_y
         self.on_ground = False
-        for p in solids:
+        for p in grid.query(self.rect):
             if self.rect.colliderect(p):
                 if self.vel_y > 0:
                     self.rect.bottom = p.top
@@ -385,8 +293,8 @@ class Player:
         if self.invincible and not force_respawn: return
         self.lives -= 1
         
-        if force_respawn: SFX.play("hit")
-        else: SFX.play("hit")
+        if force_respawn: self.sfx.play("hit")
+        else: self.sfx.play("hit")
 
         if self.lives > 0:
             if force_respawn:
@@ -395,35 +303,47 @@ class Player:
             else:
                 self.vel_y = -8
                 self.invincible = True
-                self.invincible_timer = pygame.time.get_ticks()
+                self.invincible_timer = self.clock()
         else:
-            SFX.play("gameover")
+            self.sfx.play("gameover")
             self.dead = True
 
     def add_coin(self):
-        self.shop.add_coin(1)
-        SFX.play("coin")
+        self.coins += 1
+        if self.shop: self.shop.add_coin(1)
+        self.sfx.play("coin")
 
     def draw(self, screen, offset_x):
-        if self.invincible and (pygame.time.get_ticks() // 100) % 2 == 0: return
-        img = self.animations[self.action][int(self.frame_index)]
-        if not self.facing_right: img = pygame.transform.flip(img, True, False)
+        if self.invincible and (self.clock() // 100) % 2 == 0: return
+        img = self.anim.image(self.clock(), self.facing_right)
         screen.blit(img, (self.rect.x - offset_x - 14, self.rect.y - 18))
+        PROFILER.count("blits")
+
+def load_coin_clip():
+    imgs = [ASSETS.image(os.path.join(PATHS["items"], f"coin{i}.png"), (32, 32)) for i in range(1, 4)]
+    imgs = [i for i in imgs if i]
+    return Clip(FacingFrames(imgs, imgs), COIN_ANIM_FPS) if imgs else None
+
+def load_enemy_clip():
+    ep = os.path.join(PATHS["enemies"], "walk1.png")
+    img = ASSETS.image(ep, (32, 32))
+    if not img: return None
+    return Clip(FacingFrames([img], [ASSETS.image(ep, (32, 32), flip=True)]), ENEMY_ANIM_FPS)
 
 class Level:
-    def __init__(self, data, level_index):
+    def __init__(self, data, level_index, load_images=True, clock=None):
         self.data = data
         self.ts = data["tile_size"]
         self.offset_x = 0
         self.level_index = level_index
         self.imgs = {}
+        # Coin / enemy chạy animation theo đồng hồ của level (Simulation truyền đồng hồ ảo)
+        self.clock = clock or pygame.time.get_ticks
+        self.start = self.clock()
         
         def ld(k, f, n, s=None):
-            p = os.path.join(f, n)
-            if os.path.exists(p):
-                i = pygame.image.load(p).convert_alpha()
-                if s: i = pygame.transform.scale(i, s)
-                self.imgs[k] = i
+            i = ASSETS.image(os.path.join(f, n), s) if load_images else None
+            if i: self.imgs[k] = i
         
         ld("bg", PATHS["tiles"], f"background_{level_index}.png", (800, 380))
         ld("top", PATHS["tiles"], "ground_top.png", (self.ts, self.ts))
@@ -432,59 +352,54 @@ class Level:
         ld("pit", PATHS["tiles"], "pit.png", (self.ts, self.ts))
         ld("goal", PATHS["items"], "goal.png", (40, 40))
 
-        self.coin_imgs = []
-        for i in range(1, 4):
-            p = os.path.join(PATHS["items"], f"coin{i}.png")
-            if os.path.exists(p):
-                self.coin_imgs.append(pygame.transform.scale(pygame.image.load(p).convert_alpha(), (32, 32)))
-        self.coin_frame = 0
-
-        ep = os.path.join(PATHS["enemies"], "walk1.png")
-        self.enemy_imgs = []
-        if os.path.exists(ep):
-            self.enemy_imgs = [pygame.transform.scale(pygame.image.load(ep).convert_alpha(), (32, 32))]
-
-        self.ground_top = []
-        self.ground_center = []
-        plat_set = {(r.x, r.y) for r in self.data["platforms"]}
-        for r in self.data["platforms"]:
-            if (r.x, r.y - self.ts) in plat_set: self.ground_center.append(r)
-            else: self.ground_top.append(r)
+        self.coin_clip = get_clip("coin", load_coin_clip) if load_images else None
+        self.enemy_clip = get_clip("enemy", load_enemy_clip) if load_images else None
+
+        # Lớp tile tĩnh được nướng thành chunk, vẽ lười theo camera
+        self.static_layer = StaticLayerCache(self.data, {
+            "pit": (self.imgs.get("pit"), (50,0,0)),
+            "cen": (self.imgs.get("cen"), (139,69,19)),
+            "top": (self.imgs.get("top"), (34,139,34)),
+            "stone": (self.imgs.get("stone"), (128,128,128)),
+        })
         
-        self.active_enemies = pygame.sprite.Group()
-        for ex, ey in self.data["enemies"]:
-            self.active_enemies.add(Enemy(ex, ey, self.enemy_imgs))
+        # Mọi enemy nằm trong một EnemySystem (mảng NumPy), cập nhật theo lô
+        self.enemies = EnemySystem(self.data, self.data["enemies"], self.enemy_clip, self.clock)
 
-    def update(self, player):
-        self.coin_frame = (self.coin_frame + 0.15) % len(self.coin_imgs) if self.coin_imgs else 0
+        # Tile đổi lúc đang chơi: nướng lại chunk, bỏ Rect va chạm cũ, tính lại đoạn đi tuần
+        for fn in (self.static_layer.invalidate_cell, self.data["solid_grid"].invalidate_cell,
+                   self.enemies.on_tile_changed):
+            self.data.add_listener(fn)
+
+        # Hố / coin / đích theo cột tile: chỉ xét vài cột dưới player, coin đã nhặt chỉ tắt cờ
+        self.triggers = TriggerLayer(self.data, pit_inset=5, coin_size=20)
 
-        for pit in self.data["pits"]:
-            if player.rect.colliderect(pit.inflate(-10,-10)):
+    def update(self, player):
+        with PROFILER.section("update/triggers"):
+            # Rơi hố thì respawn, nên mỗi lần trúng hỏi lại với rect mới (chỉ các hố sau hố vừa trúng)
+            pit = self.triggers.first_hit(player.rect, PIT)
+            while pit is not None:
                 player.take_damage(force_respawn=True)
-        
-        collected = []
-        for c in self.data["coins"]:
-            cx, cy = c
-            if player.rect.colliderect(pygame.Rect(cx-10, cy-10, 20, 20)):
-                collected.append(c)
-        for c in collected:
-            if c in self.data["coins"]:
-                self.data["coins"].remove(c)
-                player.add_coin()
-
-        solids = self.data["platforms"] + self.data["stones"]
-        for enemy in self.active_enemies:
-            enemy.update(solids)
-            if player.rect.colliderect(enemy.rect.inflate(-6, -6)):
-                if player.vel_y > 0 and player.rect.bottom < enemy.rect.centery + 15:
-                    enemy.kill() 
+                pit = self.triggers.first_hit(player.rect, PIT, after=pit)
+            
+            for c in self.triggers.hits(player.rect, COIN):
+                if self.triggers.collect(c):
+                    player.add_coin()
+
+        # Enemy không tác động lên nhau nên cập nhật hết một lượt rồi mới xét chạm player (theo thứ tự)
+        with PROFILER.section("update/enemies"):
+            self.enemies.update()
+            for i in self.enemies.touching(player.rect):
+                if player.vel_y > 0 and player.rect.bottom < self.enemies.centery(i) + 15:
+                    self.enemies.kill(i)
                     player.vel_y = -8
-                    SFX.play("jump") 
+                    player.sfx.play("jump") 
                 else:
                     player.take_damage()
 
-        if self.data["goal"].colliderect(player.rect):
-            player.win = True
+        with PROFILER.section("update/triggers"):
+            if self.triggers.hits(player.rect, GOAL):
+                player.win = True
 
     def draw(self, screen):
         ox = self.offset_x
@@ -495,70 +410,136 @@ class Level:
             if self.imgs.get(k): screen.blit(self.imgs[k], (r.x-ox, r.y))
             else: pygame.draw.rect(screen, c, (r.x-ox, r.y, r.w, r.h))
 
-        for r in self.data["pits"]: dr("pit", r, (50,0,0))
-        for r in self.ground_center: dr("cen", r, (139,69,19))
-        for r in self.ground_top: dr("top", r, (34,139,34))
-        for r in self.data["stones"]: dr("stone", r, (128,128,128))
+        self.static_layer.draw(screen, ox, SCREEN_WIDTH)
         
-        cimg = self.coin_imgs[int(self.coin_frame)] if self.coin_imgs else None
-        for cx, cy in self.data["coins"]:
+        # Chỉ vẽ những vật nằm trong khung [ox, ox + SCREEN_WIDTH)
+        cimg = self.coin_clip.image(self.clock() - self.start) if self.coin_clip else None
+        visible = self.triggers.visible(COIN, ox, ox + SCREEN_WIDTH, pad=16)
+        for cx, cy in visible:
             if cimg: screen.blit(cimg, cimg.get_rect(center=(cx-ox, cy)))
             else: pygame.draw.circle(screen, (255,215,0), (int(cx-ox), int(cy)), 10)
+        PROFILER.count("blits", len(visible) + 2)  # coin + nền + đích
         
-        for e in self.active_enemies: e.draw(screen, ox)
-        dr("goal", self.data["goal"], (0,255,0))
+        self.enemies.draw(screen, ox, SCREEN_WIDTH)
+
+        goal = self.data["goal"]
+        goal_w = self.imgs["goal"].get_width() if self.imgs.get("goal") else goal.w
+        if goal.x + goal_w > ox and goal.x < ox + SCREEN_WIDTH:
+            dr("goal", goal, (0,255,0))
+
+
+# --- ĐỌC MAP ---
+def level_path(level_idx):
+    return os.path.join(PATHS["tiles"], f"level{level_idx}.json")
+
+def load_level(level_idx):
+    return load_level_file(level_path(level_idx))
+
+def load_level_file(path):
+    if not os.path.exists(path): return None
+    try:
+        # Đọc từ cache nhị phân cạnh file JSON (tự biên dịch lại khi JSON đổi)
+        ld = load_level_grid(path)
+        if not ld["spawn"]: ld["spawn"] = (100, 300)
+        if not ld["goal"]: ld["goal"] = pygame.Rect(0,0,32,32)
+        return ld
+    except: return None
+
+
+# --- LÕI MÔ PHỎNG: không cần cửa sổ, âm thanh hay đồng hồ thật ---
+class Simulation:
+    def __init__(self, level_data, level_idx, skin=None, shop=None, sfx=None, load_images=False):
+        self.level_idx = level_idx
+        self.ticks = 0
+        self.sfx = sfx or NullSound()
+        self.level = Level(level_data, level_idx, load_images=load_images, clock=self.now)
+        self.player = Player(level_data["spawn"], skin, shop, clock=self.now, sfx=self.sfx)
+
+    @classmethod
+    def from_level(cls, level_idx, **kwargs):
+        data = load_level(level_idx)
+        return cls(data, level_idx, **kwargs) if data else None
+
+    # Đồng hồ ảo: mỗi tick là 1/FPS giây, không phụ thuộc thời gian thật
+    def now(self):
+        return self.ticks * 1000 // FPS
+
+    @property
+    def done(self):
+        return self.player.dead or self.player.win
+
+    def step(self, inputs=NO_INPUT):
+        self.ticks += 1
+        with PROFILER.section("update/player"):
+            self.player.update(self.level.data, inputs)
+        self.level.update(self.player)
+        self.level.offset_x = max(0, self.player.rect.centerx - SCREEN_WIDTH // 2)
+        return self.done
 
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Super Python Bros")
+    def __init__(self, record_replays=True, shop=None, preload=True):
+        SFX.pre_init()  # trước khi SDL mở audio, buffer nhỏ mới có hiệu lực
+        with STARTUP.phase("display"):
+            pygame.display.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Super Python Bros")
+        SFX.init()  # mở mixer + nạp sfx ngay bây giờ, không để lần play() đầu tiên giữa màn chơi
         self.clock = pygame.time.Clock()
-        self.shop = ShopManager(PATHS["shop_file"])
+        self.lag_ms = 0.0  # thời gian thật chưa chạy thành tick (run() dùng, xem frame_steps)
+        self.paced_level = None
+        self.shop = shop or ShopManager(PATHS["shop_file"])
         self.state = "menu"
         self.level_idx = 1
         self.game_level = None
         self.player = None
+        self.sim = None
+
+        # Replay: ghi input mỗi lượt chơi, hoặc phát lại một replay có sẵn
+        self.record_replays = record_replays
+        self.recorder = None
+        self.playback = None
+        self.playback_inputs = None
+
+        # Nạp trước level kế tiếp trên thread nền; on_level_load(idx, giây, nền?) là hook đo thời gian
+        self.preload = preload
+        self.load_times = []
+        self.on_level_load = None
+        self.preloader = LevelPreloader(self.build_sim, on_loaded=self.report_level_load)
         
         SFX.play_bgm("menu.mp3")
 
-        # UI Assets
-        self.bg_menu = None
-        self.shop_bg = None 
-        self.logo = None
-        self.btn_img = None
-        self.btn_hover = None
-        self.skin_imgs = {}
-        self.coin_icon_hud = None
-        
-        def ld_ui(n, s=None):
-            p = os.path.join(PATHS["ui"], n)
-            if os.path.exists(p):
-                i = pygame.image.load(p).convert_alpha()
-                if s: i = pygame.transform.scale(i, s)
-                return i
-            return None
-
-        self.bg_menu = ld_ui("menu.jpg", (SCREEN_WIDTH, SCREEN_HEIGHT))
-        self.shop_bg = ld_ui("shop.png", (SCREEN_WIDTH, SCREEN_HEIGHT)) 
-        self.logo = ld_ui("Logo_game.png", (300, 130))
-        self.btn_img = ld_ui("button.png", (220, 60))
-        self.btn_hover = ld_ui("button_hover.png", (220, 60))
-        
-        for s in ["nhanvat1", "nhanvat2", "nhanvat3", "nhanvat4"]:
-            img = ld_ui(f"{s}.png", (80, 80))
-            if img: self.skin_imgs[s] = img
-            
-        self.coin_icon_hud = ld_ui("coin.png", (30, 30))
-        if not self.coin_icon_hud:
-            try:
-                rc = pygame.image.load(os.path.join(PATHS["items"], "coin1.png")).convert_alpha()
-                self.coin_icon_hud = pygame.transform.scale(rc, (30, 30))
-            except: pass
+        # UI Assets: chỉ ảnh của menu được nạp ngay, ảnh shop / HUD nạp khi dùng lần đầu
+        self.hud = HudCompositor((SCREEN_WIDTH, SCREEN_HEIGHT))
+        with STARTUP.phase("menu art"):
+            self.bg_menu = self.ld_ui("menu.jpg", (SCREEN_WIDTH, SCREEN_HEIGHT))
+            self.logo = self.ld_ui("Logo_game.png", (300, 130))
+            self.btn_img = self.ld_ui("button.png", (220, 60))
+            self.btn_hover = self.ld_ui("button_hover.png", (220, 60))
 
         self.level_buttons = []
         self.init_buttons()
 
+    @staticmethod
+    def ld_ui(n, s=None):
+        return ASSETS.image(os.path.join(PATHS["ui"], n), s)
+
+    @cached_property
+    def shop_bg(self):
+        return self.ld_ui("shop.png", (SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    @cached_property
+    def skin_imgs(self):
+        imgs = {}
+        for s in ["nhanvat1", "nhanvat2", "nhanvat3", "nhanvat4"]:
+            img = self.ld_ui(f"{s}.png", (80, 80))
+            if img: imgs[s] = img
+        return imgs
+
+    @cached_property
+    def coin_icon_hud(self):
+        return self.ld_ui("coin.png", (30, 30)) or ASSETS.image(os.path.join(PATHS["items"], "coin1.png"), (30, 30))
+
     def init_buttons(self):
         cx, cy = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
         start_y = 150
@@ -573,7 +554,7 @@ class Game:
                                img=self.btn_img, img_hover=self.btn_hover)
         
         self.btn_quit = Button(pygame.Rect(cx-110, start_y + gap*2, 220, 60), "Q U I T", 
-                               lambda: sys.exit(),
+                               self.quit,
                                img=self.btn_img, img_hover=self.btn_hover)
         
         # --- LEVEL SELECT (6 LEVELS) ---
@@ -620,6 +601,10 @@ class Game:
         elif self.state not in menu_group and new_state in menu_group:
             SFX.play_bgm("menu.mp3")
 
+        if new_state in menu_group:
+            # Skin có thể đổi trong shop -> bỏ level đã nạp trước
+            self.preloader.discard()
+
         self.state = new_state
         if new_state == "level_select":
             self.init_buttons()
@@ -667,6 +652,10 @@ class Game:
         else:
             pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_ARROW)
 
+    def quit(self):
+        self.shop.flush()
+        sys.exit()
+
     def go_menu(self):
         self.set_state("menu")
         self.game_level = None
@@ -680,72 +669,113 @@ class Game:
         self.game_level = None
         self.set_state("playing")
 
-    def load_level_data(self):
-        path = os.path.join(PATHS["tiles"], f"level{self.level_idx}.json")
-        if not os.path.exists(path): return None
+    def start_replay(self, replay):
+        self.playback = replay
+        self.playback_inputs = replay.inputs()
+        self.start_specific_level(replay.level_idx)
+
+    def stop_replay(self):
+        self.playback = None
+        self.playback_inputs = None
+        self.game_level = None
+        self.set_state("level_select")
+
+    def finish_run(self):
+        # Lượt chơi kết thúc (thắng / thua): lưu replay kèm kết quả để kiểm tra lại sau
+        if not self.recorder: return
+        self.recorder.finish(self.player)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(PATHS["replays"], f"level{self.level_idx}_{stamp}_{self.sim.ticks}.rpl")
         try:
-            with open(path, "r", encoding="utf-8-sig") as f:
-                data = json.load(f)
-            
-            ts = data.get("tile_size", 32)
-            tiles = data.get("tiles", [])
-            width = max(len(r) for r in tiles)
-            
-            ld = {
-                "platforms": [], "stones": [], "pits": [], "coins": [],
-                "enemies": [], "spawn": None, "goal": None,
-                "tile_size": ts, "width": width, "height": len(tiles)
-            }
-            
-            for y, row in enumerate(tiles):
-                row = row.ljust(width, '.')
-                for x, ch in enumerate(row):
-                    r = pygame.Rect(x*ts, y*ts, ts, ts)
-                    if ch=='#': ld["platforms"].append(r)
-                    elif ch=='S': ld["stones"].append(r)
-                    elif ch=='_': ld["pits"].append(r)
-                    elif ch=='C': ld["coins"].append((r.centerx, r.centery))
-                    elif ch=='E': ld["enemies"].append((r.x, r.y))
-                    elif ch=='P': ld["spawn"] = (r.x, r.y)
-                    elif ch=='G': ld["goal"] = r
-            
-            if not ld["spawn"]: ld["spawn"] = (100, 300)
-            if not ld["goal"]: ld["goal"] = pygame.Rect(0,0,32,32)
-            return ld
-        except: return None
+            self.recorder.save(path)
+        except OSError as e:
+            print(f"Lỗi lưu replay {path}: {e}")
+        self.recorder = None
 
-    def update(self):
+    def load_level_data(self):
+        return load_level(self.level_idx)
+
+    def build_sim(self, level_idx, shop=True):
+        # Dựng Simulation + nướng sẵn chunk tile đầu tiên; chạy được trên thread nạp trước
+        parsed = load_level(level_idx)
+        if not parsed: return None
+        if shop is True: shop = self.shop
+        sim = Simulation(parsed, level_idx, self.shop.state["equipped_skin"], shop, SFX, load_images=True)
+        sim.level.static_layer.warm(0, SCREEN_WIDTH)
+        return sim
+
+    def report_level_load(self, level_idx, seconds, background):
+        # Có thể được gọi từ thread nạp trước
+        self.load_times.append((level_idx, seconds, background))
+        if self.on_level_load: self.on_level_load(level_idx, seconds, background)
+
+    def frame_steps(self):
+        # Số tick cố định cần chạy cho thời gian thật đã trôi từ frame trước: FPS tụt thì một frame chạy
+        # nhiều tick, nên vật lý và animation (đồng hồ tick của Simulation) vẫn theo thời gian thật
+        # Frame đầu của level (frame trước còn bận nạp level) cũng chỉ một tick, không đuổi bù
+        if self.state != "playing" or not self.game_level or self.playback or self.paced_level is not self.game_level:
+            self.paced_level = self.game_level
+            self.lag_ms = 0.0
+            return 1
+        self.lag_ms = min(self.lag_ms + self.clock.get_time(), MAX_STEPS_PER_FRAME * STEP_MS)
+        steps = int((self.lag_ms + STEP_SLACK_MS) // STEP_MS)
+        self.lag_ms -= steps * STEP_MS
+        return steps
+
+    def update(self, inputs=None, steps=1):
+        # steps: số tick chạy trong lần gọi này. Headless / bench / replay luôn 1 tick mỗi lần gọi
         if self.state == "playing":
             if not self.game_level:
-                parsed = self.load_level_data()
-                if parsed:
-                    self.game_level = Level(parsed, self.level_idx)
-                    skin = self.shop.state["equipped_skin"]
-                    self.player = Player(self.game_level.data["spawn"], skin, self.shop)
+                # Phát lại replay không được cộng coin / mở level trong shop
+                if self.playback: self.sim = self.build_sim(self.level_idx, shop=None)
+                else: self.sim = self.preloader.take(self.level_idx)
+                if self.sim:
+                    self.game_level = self.sim.level
+                    self.player = self.sim.player
+                    self.recorder = Replay(self.level_idx) if self.record_replays and not self.playback else None
                     
                     # --- MỚI THÊM: PHÁT NHẠC NỀN CHO TỪNG LEVEL ---
                     SFX.play_bgm(f"level{self.level_idx}")
+
+                    if self.preload and not self.playback and os.path.exists(level_path(self.level_idx + 1)):
+                        self.preloader.request(self.level_idx + 1)
                 else:
                     print(f"Chưa có map level {self.level_idx}")
                     self.set_state("level_select")
 
             if self.player and self.game_level:
-                self.player.update(self.game_level.data)
-                self.game_level.update(self.player)
-                self.game_level.offset_x = max(0, self.player.rect.centerx - SCREEN_WIDTH // 2)
-
-                if self.player.dead:
+                if self.playback:
+                    inputs = next(self.playback_inputs, None)
+                    if inputs is None:
+                        self.stop_replay()
+                        return
+                elif inputs is None:
+                    inputs = read_keyboard()
+
+                # Tick cố định, cùng đường chạy với Simulation headless; input giữ nguyên trong frame
+                for _ in range(steps):
+                    self.sim.step(inputs)
+                    if self.recorder: self.recorder.record(inputs, self.player)
+                    if self.sim.done: break
+
+                if self.sim.done: self.finish_run()
+                if self.playback and self.sim.done:
+                    print(f"Replay kết thúc ở tick {self.sim.ticks}: win={self.player.win} coins={self.player.coins}")
+                    self.stop_replay()
+                elif self.player.dead:
                     self.state = "game_over"
                 elif self.player.win:
                     self.shop.unlock_next_level(self.level_idx)
                     self.level_idx += 1
-                    path_next = os.path.join(PATHS["tiles"], f"level{self.level_idx}.json")
-                    if not os.path.exists(path_next):
+                    if not os.path.exists(level_path(self.level_idx)):
                         print("Hết màn chơi!")
                         self.set_state("level_select")
                     else:
                         self.game_level = None
 
+                # Hết lượt: ghi tiến trình ngay thay vì chờ nhịp ghi nền
+                if self.sim.done: self.shop.flush()
+
     def draw(self):
         # 1. MENU
         if self.state == "menu":
@@ -761,11 +791,9 @@ class Game:
             if self.bg_menu: self.screen.blit(self.bg_menu, (0,0))
             else: self.screen.fill((30, 30, 40))
             
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 150))
-            self.screen.blit(overlay, (0,0))
+            self.screen.blit(self.hud.overlay(150), (0,0))
             
-            t = FONT_TITLE.render("SELECT LEVEL", True, (255, 255, 255))
+            t = TEXT.render(FONT_TITLE, "SELECT LEVEL", (255, 255, 255))
             self.screen.blit(t, t.get_rect(center=(SCREEN_WIDTH//2, 60)))
             
             for btn in self.level_buttons:
@@ -777,15 +805,11 @@ class Game:
             if self.shop_bg: self.screen.blit(self.shop_bg, (0,0))
             else: self.screen.fill((30, 30, 40))
             
-            hud_surf = pygame.Surface((120, 40), pygame.SRCALPHA)
-            hud_surf.fill((0, 0, 0, 140))
-            pygame.draw.rect(hud_surf, (200, 200, 200), hud_surf.get_rect(), width=2, border_radius=10)
-            self.screen.blit(hud_surf, (20, 10))
+            self.screen.blit(self.hud.panel((120, 40), fill=(0, 0, 0, 140), border=(200, 200, 200), radius=10), (20, 10))
             
             coins = self.shop.state["coins"]
             if self.coin_icon_hud: self.screen.blit(self.coin_icon_hud, (25, 18))
-            lbl = FONT_BTN.render(str(coins), True, (255, 230, 100))
-            self.screen.blit(lbl, (60, 20))
+            TEXT.blit_number(self.screen, FONT_BTN, coins, (255, 230, 100), topleft=(60, 20))
             
             self.btn_back.draw(self.screen)
             
@@ -798,9 +822,7 @@ class Game:
                 x = start_x + i * 180
                 rect = pygame.Rect(x, start_y, 160, 220)
                 
-                card_surf = pygame.Surface((160, 220), pygame.SRCALPHA)
-                card_surf.fill((0, 0, 0, 150))
-                self.screen.blit(card_surf, (x, start_y))
+                self.screen.blit(self.hud.panel((160, 220), fill=(0, 0, 0, 150)), (x, start_y))
                 
                 color = (50, 200, 50) if sid == equipped else (200, 200, 200)
                 pygame.draw.rect(self.screen, color, rect, width=2, border_radius=15)
@@ -809,7 +831,7 @@ class Game:
                     img = self.skin_imgs[sid]
                     self.screen.blit(img, img.get_rect(center=(rect.centerx, rect.centery - 40)))
                 
-                nm = FONT_BTN.render(sid, True, (255, 255, 255))
+                nm = TEXT.render(FONT_BTN, sid, (255, 255, 255))
                 self.screen.blit(nm, nm.get_rect(center=(rect.centerx, rect.centery + 10)))
                 
                 btn_rect = pygame.Rect(rect.left + 10, rect.bottom - 55, 140, 45)
@@ -821,78 +843,107 @@ class Game:
                     bg = (231, 76, 60)
                 pygame.draw.rect(self.screen, bg, btn_rect, border_radius=20)
                 pygame.draw.rect(self.screen, (255,255,255), btn_rect, width=2, border_radius=20)
-                l = FONT_BTN.render(txt, True, (255,255,255))
+                l = TEXT.render(FONT_BTN, txt, (255,255,255))
                 self.screen.blit(l, l.get_rect(center=btn_rect.center))
 
         # 4. PLAYING / PAUSE / GAME OVER
         else:
             self.screen.fill((0, 0, 0))
             if self.game_level and self.player:
-                self.game_level.draw(self.screen)
-                self.player.draw(self.screen, self.game_level.offset_x)
+                with PROFILER.section("draw/world"):
+                    self.game_level.draw(self.screen)
+                    self.player.draw(self.screen, self.game_level.offset_x)
             
-            self.btn_pause_small.draw(self.screen)
-            
-            if self.player:
-                # --- HUD CĂN CHỈNH LẠI ---
-                hud_bg = pygame.Surface((140, 45), pygame.SRCALPHA)
-                pygame.draw.rect(hud_bg, (0, 0, 0, 160), hud_bg.get_rect(), border_radius=22) 
-                pygame.draw.rect(hud_bg, (255, 215, 0), hud_bg.get_rect(), width=2, border_radius=22)
-                self.screen.blit(hud_bg, (20, 20))
-
-                total = self.shop.state["coins"]
-                
-                if self.coin_icon_hud:
-                    self.screen.blit(self.coin_icon_hud, (30, 28))
-                    text_x = 70
-                else:
-                    text_x = 40
-                
-                # --- CANH GIỮA TEXT COIN ---
-                txt = FONT_BTN.render(f"{total}", True, (255, 255, 255))
-                txt_shadow = FONT_BTN.render(f"{total}", True, (0, 0, 0))
-                
-                # Tính toán Y để text nằm giữa khung
-                txt_rect = txt.get_rect(midleft=(text_x, 43))
-                txt_shadow_rect = txt_shadow.get_rect(midleft=(text_x + 2, 45))
-                
-                self.screen.blit(txt_shadow, txt_shadow_rect)
-                self.screen.blit(txt, txt_rect)
-                
-                for i in range(self.player.lives):
-                    draw_heart(self.screen, 35 + i*30, 85, (230, 50, 50))
+            with PROFILER.section("draw/hud"):
+                self.draw_hud()
 
-            if self.state == "pause" or self.state == "game_over":
-                overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-                overlay.fill((0, 0, 0, 180)) 
-                self.screen.blit(overlay, (0,0))
-                
-                cx = SCREEN_WIDTH // 2
-                
-                if self.state == "pause":
-                    t = FONT_TITLE.render("PAUSED", True, (255, 255, 255))
-                    self.screen.blit(t, t.get_rect(center=(cx, 100)))
-                    self.btn_resume.draw(self.screen)
-                    self.btn_menu_p.draw(self.screen)
-                
-                elif self.state == "game_over":
-                    t = FONT_TITLE.render("GAME OVER", True, (231, 76, 60))
-                    self.screen.blit(t, t.get_rect(center=(cx, 100)))
-                    self.btn_replay.draw(self.screen)
-                    self.btn_menu_go.draw(self.screen)
+        if PROFILER.active:
+            with PROFILER.section("draw/profiler"):
+                self.draw_profiler()
+
+        with PROFILER.section("draw/flip"):
+            pygame.display.flip()
+
+    def draw_hud(self):
+        # HUD + overlay pause / game over vẽ đè lên màn chơi
+        self.btn_pause_small.draw(self.screen)
+        
+        if self.player:
+            # --- HUD CĂN CHỈNH LẠI ---
+            self.screen.blit(self.hud.panel((140, 45), rounded=(0, 0, 0, 160), border=(255, 215, 0), radius=22), (20, 20))
 
-        pygame.display.flip()
+            total = self.shop.state["coins"]
+            
+            if self.coin_icon_hud:
+                self.screen.blit(self.coin_icon_hud, (30, 28))
+                text_x = 70
+            else:
+                text_x = 40
+            
+            # --- CANH GIỮA TEXT COIN ---
+            # Ghép từ glyph số dựng sẵn, không render font mỗi frame
+            TEXT.blit_number(self.screen, FONT_BTN, total, (0, 0, 0), midleft=(text_x + 2, 45))
+            TEXT.blit_number(self.screen, FONT_BTN, total, (255, 255, 255), midleft=(text_x, 43))
+            
+            self.hud.blit_hearts(self.screen, self.player.lives, 35, 85)
+            PROFILER.count("blits", 2 if self.coin_icon_hud else 1)
+
+        if self.state == "pause" or self.state == "game_over":
+            self.screen.blit(self.hud.overlay(180), (0,0))
+            
+            cx = SCREEN_WIDTH // 2
+            
+            if self.state == "pause":
+                t = TEXT.render(FONT_TITLE, "PAUSED", (255, 255, 255))
+                self.screen.blit(t, t.get_rect(center=(cx, 100)))
+                self.btn_resume.draw(self.screen)
+                self.btn_menu_p.draw(self.screen)
+            
+            elif self.state == "game_over":
+                t = TEXT.render(FONT_TITLE, "GAME OVER", (231, 76, 60))
+                self.screen.blit(t, t.get_rect(center=(cx, 100)))
+                self.btn_replay.draw(self.screen)
+                self.btn_menu_go.draw(self.screen)
+
+    def draw_profiler(self):
+        # Bảng thời gian từng pha (trung bình / p99) + bộ đếm mỗi frame, bên phải dưới nút pause
+        lines = PROFILER.lines
+        if not lines: return
+        budget = 1000 / FPS
+        w, h = 250, 18 * len(lines) + 10
+        x0, y0 = SCREEN_WIDTH - w - 10, 70
+        self.screen.blit(self.hud.panel((w, h), fill=(0, 0, 0, 170)), (x0, y0))
+        for i, (label, avg, p99) in enumerate(lines):
+            y = y0 + 5 + i * 18
+            over = i and label == "frame" and float(p99) > budget
+            color = (255, 90, 90) if over else (230, 230, 230)
+            self.screen.blit(TEXT.render(FONT_PROFILER, label, color), (x0 + 8, y))
+            for text, right in ((avg, x0 + 180), (p99, x0 + w - 8)):
+                t = TEXT.render(FONT_PROFILER, text, color)
+                self.screen.blit(t, t.get_rect(topright=(right, y)))
+
+    def dump_profile(self):
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(PATHS["profiles"], f"frames_{stamp}.csv")
+        try:
+            print(f"Đã ghi {len(PROFILER.samples)} frame vào {PROFILER.dump_csv(path)}")
+        except OSError as e:
+            print(f"Lỗi ghi profile {path}: {e}")
 
     def handle_input(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                sys.exit()
+                self.quit()
             
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     if self.state == "playing": self.set_state("pause")
                     elif self.state == "shop": self.set_state("menu")
                     elif self.state == "level_select": self.set_state("menu")
+                elif event.key == pygame.K_F3:
+                    PROFILER.toggle()
+                elif event.key == pygame.K_F4 and PROFILER.samples:
+                    self.dump_profile()
 
             if self.state == "menu":
                 self.btn_play.handle_event(event)
@@ -931,12 +982,22 @@ class Game:
 
     def run(self):
         while True:
-            self.update_cursor()
-            self.handle_input()
-            self.update()
-            self.draw()
+            with PROFILER.section("frame"):
+                with PROFILER.section("input"):
+                    self.update_cursor()
+                    self.handle_input()
+                with PROFILER.section("update"):
+                    self.update(steps=self.frame_steps())
+                with PROFILER.section("draw"):
+                    self.draw()
+            PROFILER.end_frame()
+            STARTUP.mark("first frame")
             self.clock.tick(FPS)
 
 if __name__ == "__main__":
-    game = Game()
+    if "--trace-startup" in sys.argv: STARTUP.enabled = True
+    if "--profile" in sys.argv: PROFILER.active = True
+    STARTUP.mark("imports")
+    with STARTUP.phase("Game()"):
+        game = Game()
     game.run()
\ No newline at end of file
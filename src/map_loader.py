@@ -4,6 +4,8 @@ import json
 import os
 import pygame
 
+from level_grid import LevelGrid
+
 TILE_EMPTY = '.'
 TILE_PLATFORM = '#'
 TILE_COIN = 'C'
@@ -31,46 +33,11 @@ def load_level_json(path):
 
 def parse_level(data):
     tile_size = data["tile_size"]
-    tiles = data["tiles"]
-
-    platform_list = []
-    stone_list = []       # <-- thêm list cho S
-    pit_list = []
-    coin_list = []
-    enemy_list = []
-    spawn_point = None
-    goal_rect = None
-
-    height = len(tiles)
-    width = max(len(r) for r in tiles)
-
-    for y, row in enumerate(tiles):
-        row = row.ljust(width, TILE_EMPTY)
-
-        for x, ch in enumerate(row):
-            px = x * tile_size
-            py = y * tile_size
-
-            if ch == TILE_PLATFORM:
-                platform_list.append(pygame.Rect(px, py, tile_size, tile_size))
-
-            elif ch == TILE_STONE:           # <-- xử lý 'S'
-                stone_list.append(pygame.Rect(px, py, tile_size, tile_size))
-
-            elif ch == TILE_PIT:
-                pit_list.append(pygame.Rect(px, py, tile_size, tile_size))
-
-            elif ch == TILE_COIN:
-                coin_list.append((px + tile_size // 2, py + tile_size // 2))
-
-            elif ch == TILE_ENEMY:
-                enemy_list.append((px, py))
-
-            elif ch == TILE_SPAWN:
-                spawn_point = (px, py)
 
-            elif ch == TILE_GOAL:
-                goal_rect = pygame.Rect(px, py, tile_size, tile_size)
+    # Map giữ dạng mảng byte; Rect và danh sách object chỉ dựng khi được hỏi
+    grid = LevelGrid.from_rows(data["tiles"], tile_size, TILE_EMPTY)
+    spawn_point = grid.spawn
+    goal_rect = grid.goal
 
     if spawn_point is None:
         raise ValueError("Spawn P missing!")
@@ -82,16 +49,16 @@ def parse_level(data):
     # --------------------------
     print("\n===== LEVEL INFO =====")
     print(f"Tile size: {tile_size}")
-    print(f"Platforms (#): {len(platform_list)}")
-    print(f"Stones (S): {len(stone_list)}")        # <-- in số lượng S
-    print(f"Pits (_): {len(pit_list)}")
+    print(f"Platforms (#): {grid.count(ord(TILE_PLATFORM))}")
+    print(f"Stones (S): {grid.count(ord(TILE_STONE))}")        # <-- in số lượng S
+    print(f"Pits (_): {grid.count(ord(TILE_PIT))}")
 
-    print(f"Coins: {len(coin_list)}")
-    for cx, cy in coin_list:
+    print(f"Coins: {len(grid.coins)}")
+    for cx, cy in grid.coins:
         print(f"  - Coin pixel=({cx},{cy}) tile=({cx//tile_size},{cy//tile_size})")
 
-    print(f"Enemies: {len(enemy_list)}")
-    for ex, ey in enemy_list:
+    print(f"Enemies: {len(grid.enemies)}")
+    for ex, ey in grid.enemies:
         print(f"  - Enemy pixel=({ex},{ey}) tile=({ex//tile_size},{ey//tile_size})")
 
     print(f"Spawn: pixel={spawn_point} tile=({spawn_point[0]//tile_size},{spawn_point[1]//tile_size})")
@@ -100,22 +67,13 @@ def parse_level(data):
     print(f"Goal: pixel=({gx},{gy}) tile=({gx//tile_size},{gy//tile_size})")
 
     # In từng stone pixel/tile (nếu cần)
-    for s in stone_list:
+    for s in grid.stones:
         print(f"  - Stone pixel=({s.x},{s.y}) tile=({s.x//tile_size},{s.y//tile_size})")
 
     print("======================\n")
 
-    return {
-        "tile_size": tile_size,
-        "platform_list": platform_list,
-        "stone_list": stone_list,   # <-- trả về stone_list
-        "pit_list": pit_list,
-        "coin_list": coin_list,
-        "enemy_list": enemy_list,
-        "spawn_point": spawn_point,
-        "goal_rect": goal_rect,
-        "raw_tiles": tiles
-    }
+    # LevelGrid vẫn đọc được bằng các khóa cũ: "platform_list", "coin_list", "raw_tiles"...
+    return grid
 
 
 # --------------------------
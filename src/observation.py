@@ -0,0 +1,146 @@
+# observation.py – Xuất hình / dữ liệu của game cho agent và phân tích offline, không copy mỗi tick
+#   FrameBuffer: Surface vẽ thẳng vào mảng NumPy (pygame.image.frombuffer), đọc frame là đọc view
+#   MiniMap:     ảnh palette thu nhỏ (mỗi pixel là chỉ số loại vật), vẽ thẳng ở độ phân giải thấp
+#   TileWindow:  cửa sổ mã tile quanh player, là view cắt từ lưới đã đệm viền
+import numpy as np
+import pygame
+
+from level_grid import EMPTY, PLATFORM, STONE, PIT, COIN, ENEMY, SPAWN, GROUND_CENTER
+from triggers import COIN as COIN_TRIGGER
+
+# Chỉ số palette của MiniMap và màu để xem (PALETTE[mini] -> ảnh RGB)
+SKY, GROUND_TOP_PX, GROUND_CENTER_PX, STONE_PX, PIT_PX, COIN_PX, ENEMY_PX, PLAYER_PX, GOAL_PX = range(9)
+PALETTE = np.array([(135, 206, 235), (34, 139, 34), (139, 69, 19), (128, 128, 128), (50, 0, 0),
+                    (255, 215, 0), (200, 40, 40), (40, 80, 220), (0, 255, 0)], dtype=np.uint8)
+
+
+class FrameBuffer:
+    # Pixel nằm trong self.pixels (h, w, 4) theo thứ tự R, G, B, X; self.surface dùng chung bộ nhớ đó
+    def __init__(self, size):
+        w, h = size
+        self.pixels = np.zeros((h, w, 4), dtype=np.uint8)
+        self.surface = pygame.image.frombuffer(self.pixels, (w, h), "RGBX")
+        self.rgb = self.pixels[..., :3]  # view (h, w, 3), không copy
+
+    def render(self, level, player):
+        level.draw(self.surface)
+        player.draw(self.surface, level.offset_x)
+        return self.rgb
+
+
+class MiniMap:
+    # Nền tĩnh của cả level vẽ một lần ở tỉ lệ 1/scale (theo khối rắn đã gộp), mỗi frame chỉ cắt
+    # phần trong camera rồi chấm coin / enemy / player lên
+    def __init__(self, level, view_size, scale=4):
+        self.level = level
+        self.grid = level.data
+        self.scale = scale
+        self.ts = self.grid.tile_size
+        vw, vh = view_size
+        self.view_w = vw // scale
+        h = max(self.grid.height * self.ts, vh) // scale
+        w = max(self.grid.width * self.ts, vw) // scale
+        self.static = np.full((h, w), SKY, dtype=np.uint8)
+        self.out = np.zeros((vh // scale, self.view_w), dtype=np.uint8)
+
+        for block in self.grid.solid_grid.blocks:
+            if block is None: continue  # khối đã bị tách sau set_tile, các ô con nằm ở cuối danh sách
+            c0, r0, c1, r1, code, ground = block
+            self._paint(c0, r0, c1, r1, self._index(code, ground))
+        for col, row in self.grid.cells(PIT):
+            self._paint(col, row, col, row, PIT_PX)
+        goal = self.grid.goal
+        if goal: self._fill(self.static, goal, GOAL_PX, 0)
+        self.grid.add_listener(self.on_tile_changed)
+
+    def close(self):
+        # Bỏ đăng ký khỏi LevelGrid khi không dùng nữa, nếu không tile đổi vẫn gọi vẽ lại
+        self.grid.remove_listener(self.on_tile_changed)
+
+    @staticmethod
+    def _index(code, ground):
+        if code == STONE: return STONE_PX
+        if code == PIT: return PIT_PX
+        if code == PLATFORM: return GROUND_CENTER_PX if ground == GROUND_CENTER else GROUND_TOP_PX
+        return SKY
+
+    def _paint(self, c0, r0, c1, r1, index):
+        k = self.ts
+        s = self.scale
+        self.static[r0 * k // s:(r1 + 1) * k // s, c0 * k // s:(c1 + 1) * k // s] = index
+
+    def _fill(self, out, rect, index, ox):
+        s = self.scale
+        x0, x1 = max((rect.left - ox) // s, 0), max(-(-(rect.right - ox) // s), 0)
+        out[max(rect.top // s, 0):max(-(-rect.bottom // s), 0), x0:x1] = index
+
+    def on_tile_changed(self, col, row):
+        # Vẽ lại ô vừa đổi và ô ngay dưới (ground top / center có thể đổi theo)
+        for r in (row, row + 1):
+            if 0 <= col < self.grid.width and 0 <= r < self.grid.height:
+                code = self.grid.tile_at(col, r)
+                self._paint(col, r, col, r, self._index(code, self.grid.ground_kind(col, r)))
+
+    def render(self, player):
+        # Trả self.out (dùng lại mỗi lần gọi): mảng (h, w) chỉ số palette của khung camera
+        ox = self.level.offset_x
+        s = self.scale
+        x0 = ox // s
+        out = self.out
+        view = self.static[:out.shape[0], x0:x0 + self.view_w]
+        out[:, :view.shape[1]] = view
+        out[:, view.shape[1]:] = SKY
+
+        h, w = out.shape
+        tr = self.level.triggers
+        for cx, cy in tr.visible(COIN_TRIGGER, ox, ox + self.view_w * s):
+            x, y = (cx - ox) // s, cy // s
+            out[max(y - 1, 0):y + 2, max(x - 1, 0):x + 2] = COIN_PX
+
+        en = self.level.enemies
+        for i in np.flatnonzero(en.alive & (en.x + en.w > ox) & (en.x < ox + w * s)):
+            self._fill(out, en.rect(i), ENEMY_PX, ox)
+        self._fill(out, player.rect, PLAYER_PX, ox)
+        return out
+
+
+class TileWindow:
+    # Bản sao lưới mã tile có viền EMPTY rộng bằng bán kính cửa sổ: cắt quanh player là một view,
+    # không kiểm tra biên. Enemy / spawn không phải địa hình nên xoá khỏi bản sao; coin đã nhặt
+    # được xoá khi đọc (theo cờ của TriggerLayer).
+    def __init__(self, level, radius=(5, 8)):
+        self.level = level
+        self.grid = level.data
+        self.rr, self.rc = radius
+        g = self.grid
+        self.padded = np.full((g.height + 2 * self.rr, g.width + 2 * self.rc), EMPTY, dtype=np.uint8)
+        self.inner = self.padded[self.rr:self.rr + g.height, self.rc:self.rc + g.width]
+        self.inner[:] = np.frombuffer(g.codes, dtype=np.uint8).reshape(g.height, g.width)
+        self.inner[(self.inner == ENEMY) | (self.inner == SPAWN)] = EMPTY
+
+        # Ô của từng coin trong lưới đệm + id trigger tương ứng
+        tr = level.triggers
+        ts = g.tile_size
+        ids = [i for i, k in enumerate(tr.kinds) if k == COIN_TRIGGER]
+        self.coin_ids = np.array(ids, dtype=np.int64)
+        self.coin_cells = np.array([(tr.centers[i][1] // ts + self.rr) * self.padded.shape[1]
+                                    + tr.centers[i][0] // ts + self.rc for i in ids], dtype=np.int64)
+        self.grid.add_listener(self.on_tile_changed)
+
+    def close(self):
+        self.grid.remove_listener(self.on_tile_changed)
+
+    def on_tile_changed(self, col, row):
+        code = self.grid.tile_at(col, row)
+        self.inner[row, col] = EMPTY if code in (ENEMY, SPAWN) else code
+
+    def window(self, player):
+        # View (2*rr+1, 2*rc+1) mã tile ASCII, tâm là ô chứa tâm player; ghi đè lần đọc sau
+        if len(self.coin_ids):
+            active = np.frombuffer(self.level.triggers.active, dtype=np.uint8)[self.coin_ids]
+            self.padded.ravel()[self.coin_cells] = np.where(active, COIN, EMPTY)
+        # Ô của player kẹp vào trong map (rơi xuống hố / nhảy quá mép trên vẫn có cửa sổ)
+        ts = self.grid.tile_size
+        col = min(max(player.rect.centerx // ts, 0), self.grid.width - 1)
+        row = min(max(player.rect.centery // ts, 0), self.grid.height - 1)
+        return self.padded[row:row + 2 * self.rr + 1, col:col + 2 * self.rc + 1]
@@ -0,0 +1,87 @@
+# persistence.py – Lưu JSON kiểu write-behind: giữ state trong RAM, ghi nền theo nhịp, ghi nguyên tử
+# mark_dirty() chỉ chụp bản sao (không I/O); thread nền gom mọi thay đổi trong FLUSH_INTERVAL
+# thành một lần ghi file tạm rồi os.replace, nên tắt ngang giữa chừng không làm hỏng file cũ.
+import atexit
+import copy
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+FLUSH_INTERVAL = 1.0
+
+
+class JsonStore:
+    def __init__(self, path, interval=FLUSH_INTERVAL, **dump_kwargs):
+        self.path = Path(path)
+        self.interval = interval
+        self.dump_kwargs = dump_kwargs
+        self.writes = 0
+        self._pending = None
+        self._lock = threading.Lock()      # bảo vệ _pending
+        self._io_lock = threading.Lock()   # mỗi lúc chỉ một lần ghi
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        atexit.register(self.close)
+
+    def load(self, default=None):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+        except (OSError, ValueError) as e:
+            print(f"[Warning] Không đọc được {self.path}: {e}")
+            return default
+
+    def mark_dirty(self, state):
+        snapshot = copy.deepcopy(state)
+        with self._lock:
+            self._pending = snapshot
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name=f"save:{self.path.name}", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    @property
+    def dirty(self):
+        return self._pending is not None
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            if self._closed: return
+            time.sleep(self.interval)  # gom các thay đổi trong khoảng này
+            self._wake.clear()
+            self.flush()
+
+    def _write(self, state):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, **self.dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.writes += 1
+
+    def flush(self):
+        # Ghi ngay bản mới nhất (gọi khi hết level / thoát game); trả False nếu ghi lỗi
+        with self._io_lock:
+            with self._lock:
+                state, self._pending = self._pending, None
+            if state is None: return True
+            try:
+                self._write(state)
+            except OSError as e:
+                print(f"[Warning] Lỗi lưu {self.path}: {e}")
+                with self._lock:
+                    if self._pending is None: self._pending = state  # giữ lại để lần sau thử tiếp
+                return False
+            return True
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        return self.flush()
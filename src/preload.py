@@ -0,0 +1,45 @@
+# preload.py – Chuẩn bị level kế tiếp trên thread nền trong lúc level hiện tại đang chơi
+# build(idx) trả về đối tượng đã dựng xong (vd. Simulation); take(idx) lấy ra khi cần đổi màn.
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LevelPreloader:
+    def __init__(self, build, on_loaded=None):
+        self.build = build
+        # on_loaded(idx, seconds, background): hook đo thời gian nạp level
+        self.on_loaded = on_loaded
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preload")
+
+    def _timed_build(self, idx, background):
+        start = time.perf_counter()
+        result = self.build(idx)
+        if self.on_loaded: self.on_loaded(idx, time.perf_counter() - start, background)
+        return result
+
+    def request(self, idx):
+        if idx not in self.pending:
+            self.pending[idx] = self.executor.submit(self._timed_build, idx, True)
+
+    def ready(self, idx):
+        fut = self.pending.get(idx)
+        return fut is not None and fut.done()
+
+    def take(self, idx):
+        # Kết quả dựng sẵn (đợi nếu còn đang dựng), hoặc dựng ngay trên thread gọi nếu chưa request
+        fut = self.pending.pop(idx, None)
+        if fut is not None:
+            try:
+                return fut.result()
+            except Exception as e:
+                print(f"[Warning] Nạp trước level {idx} lỗi: {e}")
+        return self._timed_build(idx, False)
+
+    def discard(self):
+        for fut in self.pending.values(): fut.cancel()
+        self.pending.clear()
+
+    def shutdown(self):
+        self.discard()
+        self.executor.shutdown(wait=False)
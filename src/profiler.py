@@ -0,0 +1,149 @@
+# profiler.py – Đo thời gian khởi động theo từng pha, và thời gian từng pha của mỗi frame trong game
+#   python main.py --trace-startup   (hoặc STARTUP_TRACE=1) in ra ms của mỗi pha và tới frame menu đầu tiên
+#   python main.py --profile         (hoặc FRAME_PROFILE=1 / bấm F3) bật overlay; F4 xuất CSV các frame đã đo
+import csv
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+
+_T0 = time.perf_counter()  # mốc sớm nhất: lúc module này được import
+
+
+class StartupTrace:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []  # (tên, ms)
+        self.marks = {}   # tên -> ms kể từ lúc bắt đầu
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self.phases.append((name, ms))
+            if self.enabled: print(f"[startup] {name}: {ms:.1f} ms")
+
+    def mark(self, name):
+        # Chỉ ghi lần đầu (vd. "first frame")
+        if name in self.marks: return self.marks[name]
+        ms = self.marks[name] = (time.perf_counter() - _T0) * 1000
+        if self.enabled: print(f"[startup] {name} sau {ms:.1f} ms")
+        return ms
+
+
+STARTUP = StartupTrace(os.environ.get("STARTUP_TRACE") == "1")
+
+
+# -------- PROFILER THEO FRAME (F3 trong game) --------
+# Pha con đặt tên "cha/con" (vd. "update/player"); cùng tên trong một frame thì cộng dồn.
+# Bộ đếm (blits, collision tests, surfaces) tăng bằng PROFILER.count() ở các hệ thống.
+WINDOW = 120      # số frame tính trung bình / p99 trên overlay
+HISTORY = 3600    # số frame giữ lại để xuất CSV (~1 phút ở 60 FPS)
+REFRESH = 15      # overlay tính lại mỗi 15 frame, đỡ render chữ liên tục
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        # Vào pha lúc profiler đang tắt thì không có mốc: bật giữa chừng (F3) cũng không ghi pha dở đó
+        self.start = time.perf_counter() if self.profiler.active else None
+
+    def __exit__(self, *exc):
+        if self.profiler.active and self.start is not None:
+            self.profiler.add(self.name, (time.perf_counter() - self.start) * 1000)
+        self.start = None
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))]
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, window=WINDOW, history=HISTORY):
+        self.active = enabled
+        self.window = window
+        self.sections = {}
+        self.order = []        # tên pha theo thứ tự gặp lần đầu (để overlay / CSV giữ cột ổn định)
+        self.counters = []
+        self.timings = {}      # frame hiện tại: tên -> ms
+        self.counts = {}
+        self.samples = deque(maxlen=history)  # mỗi frame: (timings, counts)
+        self.frames = 0
+        self.lines = []
+
+    def toggle(self):
+        # Bật lại thì đo từ đầu; tắt thì giữ mẫu cũ để còn xuất CSV
+        self.active = not self.active
+        self.timings, self.counts = {}, {}
+        if self.active:
+            self.samples.clear()
+            self.lines = []
+        return self.active
+
+    def section(self, name):
+        # Thứ tự theo lần gọi đầu tiên nên pha cha đứng trước pha con
+        s = self.sections.get(name)
+        if s is None:
+            s = self.sections[name] = _Section(self, name)
+            self.order.append(name)
+        return s
+
+    def add(self, name, ms):
+        self.timings[name] = self.timings.get(name, 0.0) + ms
+
+    def count(self, name, n=1):
+        if not self.active: return
+        self.counts[name] = self.counts.get(name, 0) + n
+        if name not in self.counters: self.counters.append(name)
+
+    def end_frame(self):
+        if not self.active: return
+        self.samples.append((self.timings, self.counts))
+        self.timings, self.counts = {}, {}
+        self.frames += 1
+        if self.frames % REFRESH == 1: self.lines = self.summary()
+
+    def stats(self, name):
+        # (trung bình, p99) trong WINDOW frame gần nhất; frame không chạy pha đó tính 0
+        recent = list(self.samples)[-self.window:]
+        values = [t.get(name, c.get(name, 0)) for t, c in recent]
+        if not values: return 0.0, 0.0
+        return sum(values) / len(values), percentile(values, 99)
+
+    def summary(self):
+        # Các dòng (nhãn, trung bình, p99) cho overlay; pha con thụt lề theo cấp
+        lines = [("phase", "avg ms", "p99 ms")]
+        for name in self.order:
+            avg, p99 = self.stats(name)
+            label = "  " * name.count("/") + name.rsplit("/", 1)[-1]
+            lines.append((label, f"{avg:.2f}", f"{p99:.2f}"))
+        for name in self.counters:
+            avg, p99 = self.stats(name)
+            lines.append((name, f"{avg:.1f}", f"{p99:.0f}"))
+        return lines
+
+    def dump_csv(self, path):
+        # Mỗi dòng một frame: ms của từng pha rồi tới các bộ đếm
+        folder = os.path.dirname(path)
+        if folder: os.makedirs(folder, exist_ok=True)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            out = csv.writer(f)
+            out.writerow(["frame"] + [f"{n} ms" for n in self.order] + self.counters)
+            first = self.frames - len(self.samples)
+            for i, (t, c) in enumerate(self.samples):
+                out.writerow([first + i] + [f"{t.get(n, 0.0):.3f}" for n in self.order]
+                             + [c.get(n, 0) for n in self.counters])
+        return path
+
+
+PROFILER = FrameProfiler(os.environ.get("FRAME_PROFILE") == "1")
@@ -0,0 +1,148 @@
+# replay.py – Ghi và phát lại input từng frame của một lượt chơi
+#   python replay.py verify [file.rpl | thư mục ...]   # chạy headless tối đa tốc độ, so kết quả
+#   python replay.py play file.rpl                     # xem lại trong cửa sổ, tốc độ thật
+import os
+import struct
+import sys
+import time
+import zlib
+
+from inputs import pack_inputs, unpack_inputs
+
+MAGIC = b"SPBR"
+VERSION = 1
+HEADER = struct.Struct("<4sBHIB")     # magic, version, level, số cặp RLE, có kết quả?
+RESULT = struct.Struct("<IiiBHBBI")   # ticks, x, y, lives, coins, win, dead, crc quỹ đạo
+RESULT_KEYS = ("ticks", "x", "y", "lives", "coins", "win", "dead", "crc")
+
+
+def track(crc, player):
+    # CRC cộng dồn vị trí / mạng / coin mỗi tick -> lệch một frame là phát hiện được
+    return zlib.crc32(struct.pack("<iiBH", player.rect.x, player.rect.y, max(player.lives, 0), player.coins), crc)
+
+
+class Replay:
+    def __init__(self, level_idx):
+        self.level_idx = level_idx
+        self.frames = bytearray()
+        self.result = None
+        self._crc = 0
+
+    def record(self, inputs, player):
+        self.frames.append(pack_inputs(inputs))
+        self._crc = track(self._crc, player)
+
+    def finish(self, player):
+        self.result = {
+            "ticks": len(self.frames), "x": player.rect.x, "y": player.rect.y,
+            "lives": max(player.lives, 0), "coins": player.coins,
+            "win": int(player.win), "dead": int(player.dead), "crc": self._crc,
+        }
+
+    def inputs(self):
+        for bits in self.frames:
+            yield unpack_inputs(bits)
+
+    # --- File: header + các cặp (input, số frame lặp) + kết quả ---
+    def save(self, path):
+        runs = bytearray()
+        i, n = 0, len(self.frames)
+        while i < n:
+            bits = self.frames[i]
+            j = i
+            while j < n and j - i < 255 and self.frames[j] == bits:
+                j += 1
+            runs += bytes((bits, j - i))
+            i = j
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.level_idx, len(runs) // 2, self.result is not None))
+            f.write(runs)
+            if self.result is not None:
+                f.write(RESULT.pack(*(self.result[k] for k in RESULT_KEYS)))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            raw = f.read()
+        magic, version, level_idx, run_count, has_result = HEADER.unpack_from(raw, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Không phải file replay hợp lệ: {path}")
+
+        replay = cls(level_idx)
+        pos = HEADER.size
+        for k in range(run_count):
+            bits, count = raw[pos + 2 * k], raw[pos + 2 * k + 1]
+            replay.frames += bytes((bits,)) * count
+        pos += 2 * run_count
+        if has_result:
+            replay.result = dict(zip(RESULT_KEYS, RESULT.unpack_from(raw, pos)))
+        return replay
+
+
+def run_headless(replay):
+    # Chạy lại bằng Simulation, không cửa sổ, không âm thanh
+    import main
+    sim = main.Simulation.from_level(replay.level_idx)
+    if sim is None:
+        raise FileNotFoundError(f"Level file not found: {main.level_path(replay.level_idx)}")
+
+    check = Replay(replay.level_idx)
+    for inputs in replay.inputs():
+        sim.step(inputs)
+        check.record(inputs, sim.player)
+        if sim.done: break
+    check.finish(sim.player)
+    return check.result
+
+
+def _collect(paths):
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files += sorted(os.path.join(p, n) for n in os.listdir(p) if n.endswith(".rpl"))
+        else:
+            files.append(p)
+    return files
+
+
+def verify(paths):
+    files = _collect(paths)
+    start = time.perf_counter()
+    failed = 0
+    for path in files:
+        replay = Replay.load(path)
+        got = run_headless(replay)
+        if replay.result is None:
+            print(f"[SKIP] {path}: không có kết quả để so")
+        elif got != replay.result:
+            failed += 1
+            diff = {k: (replay.result[k], got[k]) for k in RESULT_KEYS if replay.result[k] != got[k]}
+            print(f"[FAIL] {path}: {diff}")
+        else:
+            print(f"[OK]   {path}: {got['ticks']} ticks, win={got['win']} coins={got['coins']}")
+    elapsed = time.perf_counter() - start
+    print(f"{len(files)} replay, {failed} lệch, {elapsed:.2f}s")
+    return failed == 0
+
+
+def play(path):
+    import main
+    game = main.Game(record_replays=False)
+    game.start_replay(Replay.load(path))
+    game.run()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "verify":
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        from main import PATHS
+        ok = verify(sys.argv[2:] or [PATHS["replays"]])
+        sys.exit(0 if ok else 1)
+    elif len(sys.argv) == 3 and sys.argv[1] == "play":
+        play(sys.argv[2])
+    else:
+        print("Usage: python replay.py verify [file|dir ...] | play <file.rpl>")
+        sys.exit(2)
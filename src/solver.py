@@ -0,0 +1,187 @@
+# solver.py – Kiểm tra mọi level có đi được tới G bằng đúng luật di chuyển của Player
+#   python solver.py [thư mục level] [--workers N] [--max-states N] [--replays DIR]
+# Tìm kiếm theo chiều rộng trên trạng thái (x, y, vel_y, on_ground), mỗi bước là một tick.
+# Enemy không được tính khi tìm đường; lời giải được chạy lại bằng Simulation đầy đủ
+# để báo nó còn thắng được hay không khi có enemy ("wins_with_enemies").
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+import main
+from collision import SolidGrid
+from inputs import Inputs
+from spatial import ColumnIndex
+
+# Nhảy chỉ có nghĩa khi đang đứng trên đất
+GROUND_ACTIONS = [Inputs(False, False, False), Inputs(True, False, False), Inputs(False, True, False),
+                  Inputs(False, False, True), Inputs(True, False, True), Inputs(False, True, True)]
+AIR_ACTIONS = GROUND_ACTIONS[:3]
+MAX_STATES = 3_000_000
+
+
+class LevelSolver:
+    def __init__(self, level_data):
+        self.data = level_data
+        self.pits = SolidGrid(level_data, solid_tiles=b"_")
+        self.goal = level_data["goal"]
+
+        # Hitbox coin giống Level.update
+        self.coins = ColumnIndex(level_data["tile_size"])
+        for cx, cy in level_data["coins"]:
+            self.coins.add((cx, cy), pygame.Rect(cx-10, cy-10, 20, 20))
+
+        # Dùng chính Player của game, không skin / âm thanh / đồng hồ thật
+        self.player = main.Player(level_data["spawn"], None, None, clock=lambda: 0, sfx=main.NullSound())
+        self.lives = self.player.lives
+
+    def advance(self, state, inputs):
+        p = self.player
+        p.rect.x, p.rect.y, p.vel_y, p.on_ground = state
+        p.lives = self.lives
+        p.update(self.data, inputs)
+        if p.lives != self.lives: return None           # rơi khỏi map
+        for pit in self.pits.query(p.rect):
+            if p.rect.colliderect(pit.inflate(-10,-10)): return None
+        return p.rect.x, p.rect.y, p.vel_y, p.on_ground
+
+    def touched_coins(self, rect):
+        return [c for c in self.coins.query(rect.left, rect.right)
+                if rect.colliderect(self.coins.entries[c][1])]
+
+    def solve(self, max_states=MAX_STATES):
+        sx, sy = self.data["spawn"]
+        start = (sx, sy, 0, False)
+        parents = {start: None}
+        queue = deque([start])
+        reached_coins = set()
+        goal_state = None
+        probe = pygame.Rect(0, 0, self.player.rect.w, self.player.rect.h)
+
+        while queue and len(parents) < max_states:
+            state = queue.popleft()
+            for inputs in (GROUND_ACTIONS if state[3] else AIR_ACTIONS):
+                nxt = self.advance(state, inputs)
+                if nxt is None or nxt in parents: continue
+                parents[nxt] = (state, inputs)
+
+                probe.topleft = nxt[0], nxt[1]
+                reached_coins.update(self.touched_coins(probe))
+                if self.goal.colliderect(probe):
+                    # BFS theo tick -> lần đầu chạm G là đường ngắn nhất; không đi tiếp sau khi thắng
+                    if goal_state is None: goal_state = nxt
+                    continue
+                queue.append(nxt)
+
+        path = []
+        node = goal_state
+        while node is not None and parents[node] is not None:
+            node, inputs = parents[node]
+            path.append(inputs)
+        path.reverse()
+
+        ts = self.data["tile_size"]
+        return {
+            "solvable": goal_state is not None,
+            "ticks": len(path) if goal_state else None,
+            "inputs": path,
+            "states": len(parents),
+            "exhausted": not queue,
+            "unreachable_coins": sorted((cx // ts, cy // ts) for cx, cy in self.data["coins"]
+                                        if (cx, cy) not in reached_coins),
+        }
+
+
+def encode_inputs(path):
+    # "R*12 RJ*1 .*3": L/R/J theo phím, '.' là đứng yên, *n là số tick lặp
+    out = []
+    for inputs in path:
+        tok = ("L" if inputs.left else "") + ("R" if inputs.right else "") + ("J" if inputs.jump else "") or "."
+        if out and out[-1][0] == tok: out[-1][1] += 1
+        else: out.append([tok, 1])
+    return " ".join(f"{tok}*{n}" for tok, n in out)
+
+
+def solve_file(path, max_states=MAX_STATES, replay_dir=None):
+    start = time.perf_counter()
+    data = main.load_level_file(path)
+    if data is None:
+        return {"level": os.path.basename(path), "error": "không đọc được level"}
+    result = LevelSolver(data).solve(max_states)
+
+    result["wins_with_enemies"] = None
+    if result["solvable"]:
+        from replay import Replay
+        m = re.search(r"level(\d+)\.json$", path)
+        sim = main.Simulation(main.load_level_file(path), int(m.group(1)) if m else 0)
+        rp = Replay(sim.level_idx)
+        for inputs in result["inputs"]:
+            sim.step(inputs)
+            rp.record(inputs, sim.player)
+            if sim.done: break
+        rp.finish(sim.player)
+        result["wins_with_enemies"] = sim.player.win
+        if replay_dir and m:
+            # Lưu đường đi ngắn nhất thành replay để xem lại: python replay.py play <file>
+            rp.save(os.path.join(replay_dir, f"level{sim.level_idx}_solution.rpl"))
+
+    result["inputs"] = encode_inputs(result["inputs"])
+    result["level"] = os.path.basename(path)
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def level_files(folder):
+    found = []
+    for name in os.listdir(folder):
+        m = re.fullmatch(r"level(\d+)\.json", name)
+        if m: found.append((int(m.group(1)), os.path.join(folder, name)))
+    return [p for _, p in sorted(found)]
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Check every level can be finished with the real Player physics")
+    parser.add_argument("folder", nargs="?", default=main.PATHS["tiles"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-states", type=int, default=MAX_STATES)
+    parser.add_argument("--replays", help="lưu lời giải ngắn nhất thành file .rpl vào thư mục này")
+    parser.add_argument("--json", help="ghi kết quả đầy đủ (kèm chuỗi input) ra file JSON")
+    args = parser.parse_args(argv)
+
+    files = level_files(args.folder)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(solve_file, f, args.max_states, args.replays) for f in files]
+        results = [f.result() for f in futures]
+
+    ok = True
+    for r in results:
+        if "error" in r:
+            ok = False
+            print(f"[ERROR] {r['level']}: {r['error']}")
+            continue
+        status = "OK  " if r["solvable"] else ("FAIL" if r["exhausted"] else "????")
+        ok = ok and r["solvable"]
+        print(f"[{status}] {r['level']}: {r['ticks']} ticks, {r['states']} trạng thái, {r['seconds']}s")
+        if r["solvable"] and not r["wins_with_enemies"]:
+            print("       lời giải bị enemy chặn khi chạy Simulation đầy đủ")
+        if r["unreachable_coins"]:
+            note = "" if r["exhausted"] else " (chưa chắc: tìm kiếm dừng ở --max-states)"
+            print(f"       coin không tới được (col,row){note}: {r['unreachable_coins']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main_cli(sys.argv[1:]) else 1)
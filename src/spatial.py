@@ -0,0 +1,37 @@
+# spatial.py – Chỉ mục theo cột để hỏi "vật nào nằm trong khung camera"
+
+
+class ColumnIndex:
+    # Mỗi vật được ghi vào các cột (rộng bucket_width px) mà rect của nó phủ lên
+    def __init__(self, bucket_width):
+        self.bucket_width = bucket_width
+        self.buckets = {}
+        self.entries = {}
+        self._seq = 0
+
+    def _span(self, rect):
+        bw = self.bucket_width
+        return rect.left // bw, (rect.right - 1) // bw
+
+    def add(self, item, rect):
+        c0, c1 = self._span(rect)
+        self.entries[item] = (self._seq, rect)
+        self._seq += 1
+        for c in range(c0, c1 + 1):
+            self.buckets.setdefault(c, []).append(item)
+
+    def query(self, x0, x1):
+        # Các vật giao với dải [x0, x1), giữ thứ tự thêm vào để vẽ không đổi
+        bw = self.bucket_width
+        found = {}
+        for c in range(x0 // bw, (x1 - 1) // bw + 1):
+            for item in self.buckets.get(c, ()):
+                if item in found: continue
+                entry = self.entries[item]
+                r = entry[1]
+                if r.right > x0 and r.left < x1:
+                    found[item] = entry[0]
+        return sorted(found, key=found.get)
+
+    def __len__(self):
+        return len(self.entries)
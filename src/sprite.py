@@ -1,16 +1,23 @@
 import pygame
+from assets import ASSETS
 
 class SpriteSheet:
     def __init__(self, filename):
-        self.sheet = pygame.image.load(filename).convert_alpha()
+        self.filename = filename
+        self.sheet = ASSETS.image(filename)
 
     def get_animation(self, x_start, y, frame_width, frame_height, frame_count, scale=None):
-        frames = []
-        for i in range(frame_count):
-            frame = self.sheet.subsurface(pygame.Rect(
-                x_start + i * frame_width, y, frame_width, frame_height
-            ))
-            if scale:
-                frame = pygame.transform.scale(frame, scale)
-            frames.append(frame)
-        return frames
\ No newline at end of file
+        def build():
+            frames = []
+            for i in range(frame_count):
+                frame = self.sheet.subsurface(pygame.Rect(
+                    x_start + i * frame_width, y, frame_width, frame_height
+                ))
+                if scale:
+                    frame = pygame.transform.scale(frame, scale)
+                    ASSETS.scale_calls += 1
+                frames.append(frame)
+            return frames
+
+        key = (self.filename, ("strip", x_start, y, frame_width, frame_height, frame_count), scale, False, "alpha")
+        return list(ASSETS.cached(key, build))
\ No newline at end of file
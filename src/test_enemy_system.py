@@ -0,0 +1,161 @@
+# test_enemy_system.py – EnemySystem ở quy mô hàng nghìn enemy phải đi y như enemy dò tường / đất từng
+# tick (main.Enemy cũ), kể cả sau LevelGrid.set_tile. Thời gian đo ở bench.py (--enemies), không assert ở đây.
+#   python -m pytest test_enemy_system.py  (hoặc python test_enemy_system.py)
+import json
+import os
+import random
+
+import numpy as np
+
+from enemy import EnemySystem, SOLID_TILES
+from level_grid import LevelGrid
+
+LEVELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "tiles")
+
+COLS = 4000
+ENEMIES = 2000
+
+
+def wide_level(cols=COLS, pit_every=0, wall_every=0):
+    # Sàn liền dài cols cột, hai tường ở hai đầu; tuỳ chọn thêm hố / tường đều đặn
+    floor = ["#"] * cols
+    body = ["#"] + ["."] * (cols - 2) + ["#"]
+    for c in range(1, cols - 1):
+        if pit_every and c % pit_every == 0: floor[c] = "."
+        if wall_every and c % wall_every == 0: body[c] = "S"
+    rows = ["." * cols] * 8 + ["".join(body), "".join(floor), "#" * cols]
+    return LevelGrid.from_rows(rows, 32)
+
+
+def spawns(n=ENEMIES, cols=COLS):
+    return [((1 + i * 7 % (cols - 2)) * 32, 8 * 32) for i in range(n)]
+
+
+def load_grid(index):
+    with open(os.path.join(LEVELS, f"level{index}.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    return LevelGrid.from_rows(data["tiles"], data["tile_size"])
+
+
+def probe_tick(grid, x, y, d, speed=1):
+    # Enemy kiểu cũ (main.Enemy trước EnemySystem): bước, lấn tường hoặc phía trước hết đất thì lùi
+    # lại và quay đầu. Dùng làm chuẩn so sánh.
+    def solid(rx, ry, w, h):
+        ts = grid.tile_size
+        return any(grid.tile_at(c, r) in SOLID_TILES
+                   for r in range(ry // ts, (ry + h - 1) // ts + 1) for c in range(rx // ts, (rx + w - 1) // ts + 1))
+    nx = x + speed * d
+    ahead = nx + 32 if d == 1 else nx - 5
+    if solid(nx, y, 32, 32) or not solid(ahead, y + 37, 5, 5): return x, -d
+    return nx, d
+
+
+def test_thousands_match_probe():
+    # Gần 2000 enemy trên sàn có hố và tường: từng tick, mọi vị trí trùng với enemy dò từng tick
+    cols = 400
+    grid = wide_level(cols, pit_every=37, wall_every=53)
+    pos = [(x, y) for x, y in spawns(cols=cols)
+           if grid.tile_at(x // 32, 8) == ord('.') and grid.tile_at(x // 32, 9) == ord('#')]
+    enemies = EnemySystem(grid, pos)
+    ref = [[x, y, 1] for x, y in pos]
+    assert len(enemies) == len(pos) > 1000
+    for _ in range(200):
+        enemies.update()
+        for e in ref:
+            e[0], e[2] = probe_tick(grid, *e)
+        assert enemies.x.tolist() == [e[0] for e in ref]
+
+
+def test_spans_on_wide_floor():
+    grid = wide_level()
+    enemies = EnemySystem(grid, spawns())
+    assert len(enemies) == ENEMIES
+    # Cả sàn là một đoạn: mọi enemy đi từ sát tường trái tới sát tường phải
+    assert (enemies.lo == 32).all() and (enemies.hi == (COLS - 1) * 32 - 32).all()
+
+
+def test_tile_change_splits_patrols():
+    grid = wide_level()
+    enemies = EnemySystem(grid, spawns())
+    col = COLS // 2
+    grid.set_tile(col, 9, ord('.'))    # đục một hố trên sàn dưới chân enemy
+    changed = enemies.on_tile_changed(col, 9)
+    assert len(changed) == ENEMIES
+    left = enemies.x < col * 32
+    assert (enemies.hi[left] < col * 32 - 32).all() and (enemies.lo[~left] > col * 32).all()
+
+    for _ in range(3000):
+        enemies.update()
+    assert (enemies.x + 32 <= col * 32)[left].all() and (enemies.x >= (col + 1) * 32)[~left].all()
+
+
+def test_spans_after_set_tile_match_probe():
+    # Đục / lấp ô sàn quanh một enemy đang đi tuần rồi cho cả hai chạy tới khi ổn định: khoảng x mỗi
+    # enemy qua lại phải trùng với enemy dò từng tick (gồm cả ca sàn còn lại hẹp hơn thân enemy)
+    rnd = random.Random(22)
+    for run in range(30):
+        grid = load_grid(run % 6 + 1)
+        enemies = EnemySystem(grid, grid.enemies)
+        ref = [[x, y, 1] for x, y in grid.enemies]
+
+        def tick():
+            enemies.update()
+            for e in ref:
+                e[0], e[2] = probe_tick(grid, *e)
+            return np.array([e[0] for e in ref])
+
+        for _ in range(rnd.randrange(300)): tick()
+        i = rnd.randrange(len(ref))
+        col, row = ref[i][0] // 32 + rnd.randint(-2, 3), ref[i][1] // 32 + 1
+        if grid.set_tile(col, row, rnd.choice(b"..#")):
+            enemies.on_tile_changed(col, row)
+        for _ in range(300): tick()
+        lo_ref = hi_ref = tick()
+        lo, hi = enemies.x.copy(), enemies.x.copy()
+        for _ in range(300):
+            x = tick()
+            lo_ref, hi_ref = np.minimum(lo_ref, x), np.maximum(hi_ref, x)
+            lo, hi = np.minimum(lo, enemies.x), np.maximum(hi, enemies.x)
+        assert (lo == lo_ref).all() and (hi == hi_ref).all(), f"run {run}: ô ({col}, {row})"
+
+
+def test_narrow_floor_left_after_set_tile():
+    # Level 1: bỏ ô sàn (49, 8) dưới enemy 4 ở nhiều thời điểm khác nhau. Cột 48 còn lại hẹp hơn thân
+    # enemy, nhưng cột 50-52 vẫn đi được: enemy không được đứng im ở chỗ dò từng tick không dừng
+    for warmup in range(0, 200, 5):
+        grid = load_grid(1)
+        enemies = EnemySystem(grid, grid.enemies)
+        e = [*grid.enemies[4], 1]
+        for _ in range(warmup):
+            enemies.update()
+            e[0], e[2] = probe_tick(grid, *e)
+        grid.set_tile(49, 8, ord('.'))
+        enemies.on_tile_changed(49, 8)
+        for _ in range(200):
+            enemies.update()
+            e[0], e[2] = probe_tick(grid, *e)
+        seen, seen_ref = set(), set()
+        for _ in range(200):
+            enemies.update()
+            e[0], e[2] = probe_tick(grid, *e)
+            seen.add(int(enemies.x[4]))
+            seen_ref.add(e[0])
+        assert seen == seen_ref, f"warmup {warmup}"
+
+
+def test_update_and_touching_batch():
+    grid = wide_level()
+    enemies = EnemySystem(grid, spawns())
+    x0 = enemies.x.copy()
+    enemies.update()
+    assert (np.abs(enemies.x - x0) <= 1).all()
+    enemies.kill(0)
+    assert len(enemies) == ENEMIES - 1
+    assert 0 not in enemies.touching(enemies.rect(0))
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(name, "ok")
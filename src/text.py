@@ -0,0 +1,82 @@
+# text.py – Font dùng chung + cache Surface chữ đã render (LRU), số đếm ghép từ glyph có sẵn
+# Font có thể truyền dạng spec (tên, cỡ, đậm, fallback): chỉ tạo khi vẽ lần đầu, import không đụng SDL.
+from collections import OrderedDict
+
+import pygame
+
+from profiler import PROFILER
+
+MAX_SURFACES = 256
+DIGITS = "0123456789-"
+
+
+class TextRenderer:
+    def __init__(self, max_surfaces=MAX_SURFACES):
+        self.max_surfaces = max_surfaces
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.glyphs = {}
+        self.renders = 0  # số lần thật sự rasterize chữ
+        self._system_fonts = None
+
+    def has_system_fonts(self):
+        # get_fonts() quét lại hệ thống mỗi lần nếu không tìm thấy font nào -> chỉ hỏi một lần
+        if self._system_fonts is None:
+            self._system_fonts = bool(pygame.font.get_fonts())
+        return self._system_fonts
+
+    def font(self, name, size, bold=False, fallback=None):
+        # fallback=(name, size, bold) dùng khi máy không có font hệ thống
+        key = (name, size, bold, fallback)
+        f = self.fonts.get(key)
+        if f is None:
+            if not pygame.font.get_init(): pygame.font.init()
+            if fallback and not self.has_system_fonts():
+                f = pygame.font.SysFont(*fallback)
+            else:
+                f = pygame.font.SysFont(name, size, bold=bold)
+            self.fonts[key] = f
+        return f
+
+    def resolve(self, font):
+        return self.font(*font) if isinstance(font, tuple) else font
+
+    def render(self, font, text, color, antialias=True):
+        font = self.resolve(font)
+        key = (font, text, tuple(color), antialias)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            return surf
+        surf = self.surfaces[key] = font.render(text, antialias, color)
+        self.renders += 1
+        PROFILER.count("surfaces")
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)
+        return surf
+
+    def _digit_glyphs(self, font, color, antialias):
+        key = (font, tuple(color), antialias)
+        glyphs = self.glyphs.get(key)
+        if glyphs is None:
+            glyphs = self.glyphs[key] = {ch: font.render(ch, antialias, color) for ch in DIGITS}
+            self.renders += len(DIGITS)
+            PROFILER.count("surfaces", len(DIGITS))
+        return glyphs
+
+    def blit_number(self, screen, font, value, color, antialias=True, **anchor):
+        # Ghép số từ glyph 0-9 dựng sẵn; anchor giống get_rect (vd. midleft=(x, y))
+        font = self.resolve(font)
+        glyphs = self._digit_glyphs(font, color, antialias)
+        parts = [glyphs[ch] for ch in str(int(value))]
+        rect = pygame.Rect(0, 0, sum(g.get_width() for g in parts), font.get_height())
+        for k, v in anchor.items(): setattr(rect, k, v)
+        x = rect.x
+        for g in parts:
+            screen.blit(g, (x, rect.y))
+            x += g.get_width()
+        PROFILER.count("blits", len(parts))
+        return rect
+
+
+TEXT = TextRenderer()
@@ -0,0 +1,92 @@
+# tile_cache.py – Nướng sẵn lớp tile tĩnh (pit, ground, stone) thành các chunk Surface
+from collections import OrderedDict
+
+import pygame
+
+from level_grid import PLATFORM, STONE, PIT, GROUND_CENTER
+from profiler import PROFILER
+
+# Chunk rộng hơn màn hình 800px nên mỗi frame chỉ cần tối đa 2 lần blit
+CHUNK_WIDTH = 1024
+MAX_CHUNKS = 4
+
+
+class StaticLayerCache:
+    # layers: {"pit" | "cen" | "top" | "stone": (image hoặc None, màu dự phòng)}
+    def __init__(self, grid, layers, chunk_width=CHUNK_WIDTH, max_chunks=MAX_CHUNKS):
+        self.grid = grid
+        self.layers = layers
+        self.chunk_width = chunk_width
+        self.max_chunks = max(max_chunks, 2)
+        self.pixel_height = grid.height * grid.tile_size
+        self.chunks = OrderedDict()
+
+    @staticmethod
+    def _kind(code, ground):
+        if code == PIT: return "pit"
+        if code == STONE: return "stone"
+        if code == PLATFORM:
+            return "cen" if ground == GROUND_CENTER else "top"
+        return None
+
+    def _fill(self, surf, kind, c0, r0, c1, r1, x0):
+        # Một khối cùng loại: ảnh lát từng ô, hoặc một lần tô màu dự phòng cho cả khối
+        if kind is None or kind not in self.layers: return
+        ts = self.grid.tile_size
+        img, color = self.layers[kind]
+        if not img:
+            pygame.draw.rect(surf, color, (c0 * ts - x0, r0 * ts, (c1 - c0 + 1) * ts, (r1 - r0 + 1) * ts))
+            return
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                surf.blit(img, (col * ts - x0, row * ts))
+
+    def _build(self, index):
+        ts = self.grid.tile_size
+        x0 = index * self.chunk_width
+        surf = pygame.Surface((self.chunk_width, self.pixel_height), pygame.SRCALPHA)
+        PROFILER.count("surfaces")
+
+        c0 = x0 // ts
+        c1 = min((x0 + self.chunk_width - 1) // ts, self.grid.width - 1)
+        # Ground / stone theo khối rắn đã gộp (mỗi khối giữ loại tile), pit vẽ từng ô
+        for block in self.grid.solid_grid.blocks:
+            if block is None or block[2] < c0 or block[0] > c1: continue
+            bc0, r0, bc1, r1, code, ground = block
+            self._fill(surf, self._kind(code, ground), max(bc0, c0), r0, min(bc1, c1), r1, x0)
+        for col, row in self.grid.cells(PIT):
+            if c0 <= col <= c1: self._fill(surf, "pit", col, row, col, row, x0)
+        return surf
+
+    def _chunk(self, index):
+        surf = self.chunks.get(index)
+        if surf is None:
+            surf = self.chunks[index] = self._build(index)
+        else:
+            self.chunks.move_to_end(index)
+        return surf
+
+    def warm(self, offset_x, view_width):
+        # Nướng trước các chunk trong khung nhìn (vd. trên thread nạp trước level)
+        cw = self.chunk_width
+        for i in range(max(offset_x // cw, 0), (offset_x + view_width - 1) // cw + 1):
+            if i * cw >= self.grid.width * self.grid.tile_size: break
+            self._chunk(i)
+
+    def draw(self, screen, offset_x, view_width):
+        cw = self.chunk_width
+        first = max(offset_x // cw, 0)
+        last = (offset_x + view_width - 1) // cw
+        for i in range(first, last + 1):
+            if i * cw >= self.grid.width * self.grid.tile_size: break
+            screen.blit(self._chunk(i), (i * cw - offset_x, 0))
+            PROFILER.count("blits")
+
+        # Bỏ các chunk xa camera, giữ bộ nhớ giới hạn
+        while len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+
+    def invalidate_cell(self, col, row):
+        # Tile đổi (vd. BreakBlock vỡ) -> nướng lại chunk chứa nó lần vẽ sau
+        # (ô ngay dưới cũng có thể đổi ground top/center nhưng nằm cùng chunk)
+        self.chunks.pop(col * self.grid.tile_size // self.chunk_width, None)
@@ -0,0 +1,73 @@
+# triggers.py – Vùng kích hoạt của level (hố, coin, đích) chia theo cột tile
+# Mỗi trigger là một bản ghi gọn: loại + hitbox tính sẵn + cờ còn hiệu lực. Xét va chạm chỉ
+# đụng tới vài cột dưới player; nhặt coin là tắt một cờ, O(1).
+import pygame
+
+from profiler import PROFILER
+
+PIT = 0
+COIN = 1
+GOAL = 2
+
+
+class TriggerLayer:
+    # pit_inset: hitbox hố thu vào mỗi cạnh (main dùng pit.inflate(-10, -10) -> 5)
+    # coin_size: cạnh hitbox coin, căn giữa tâm coin
+    def __init__(self, grid, pit_inset=0, coin_size=20):
+        self.tile_size = grid.tile_size
+        self.kinds = bytearray()
+        self.hitboxes = []
+        self.centers = []
+        self.active = bytearray()
+        self.buckets = {}  # cột -> [id trigger], id tăng dần = thứ tự trong map
+
+        for pit in grid.pits:
+            self._add(PIT, pit.inflate(-2 * pit_inset, -2 * pit_inset), pit.center)
+        half = coin_size // 2
+        for cx, cy in grid.coins:
+            self._add(COIN, pygame.Rect(cx - half, cy - half, coin_size, coin_size), (cx, cy))
+        if grid.goal:
+            self._add(GOAL, pygame.Rect(grid.goal), grid.goal.center)
+
+    def _add(self, kind, hitbox, center):
+        i = len(self.kinds)
+        self.kinds.append(kind)
+        self.hitboxes.append(hitbox)
+        self.centers.append(center)
+        self.active.append(1)
+        ts = self.tile_size
+        for c in range(hitbox.left // ts, (hitbox.right - 1) // ts + 1):
+            self.buckets.setdefault(c, []).append(i)
+
+    def _candidates(self, x0, x1):
+        # id trong các cột phủ dải [x0, x1), không trùng, theo thứ tự map
+        ts = self.tile_size
+        c0, c1 = x0 // ts, (x1 - 1) // ts
+        if c0 == c1: return self.buckets.get(c0, ())
+        found = set()
+        for c in range(c0, c1 + 1):
+            found.update(self.buckets.get(c, ()))
+        return sorted(found)
+
+    def hits(self, rect, kind, after=-1):
+        # Các trigger loại kind còn hiệu lực có hitbox chạm rect (id > after)
+        kinds, active, boxes = self.kinds, self.active, self.hitboxes
+        ids = self._candidates(rect.left, rect.right)
+        PROFILER.count("collision tests", len(ids))
+        return [i for i in ids if i > after and kinds[i] == kind and active[i] and rect.colliderect(boxes[i])]
+
+    def first_hit(self, rect, kind, after=-1):
+        found = self.hits(rect, kind, after)
+        return found[0] if found else None
+
+    def collect(self, i):
+        # Tắt trigger (vd. coin đã nhặt); trả False nếu đã tắt từ trước
+        if not self.active[i]: return False
+        self.active[i] = 0
+        return True
+
+    def visible(self, kind, x0, x1, pad=0):
+        # Tâm các trigger còn hiệu lực nằm trong khung [x0, x1) (nới pad mỗi bên), để vẽ
+        kinds, active, centers = self.kinds, self.active, self.centers
+        return [centers[i] for i in self._candidates(x0 - pad, x1 + pad)
+                if kinds[i] == kind and active[i] and x0 - pad < centers[i][0] < x1 + pad]
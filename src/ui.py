@@ -1,17 +1,20 @@
 import pygame
-import json
 import os
+from functools import cached_property
 from pathlib import Path
 from typing import Callable, List, Optional, Tuple
 
-pygame.init()
+from assets import ASSETS
+from text import TEXT
+from persistence import JsonStore
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
 ASSET_PATH = os.path.join(PROJECT_ROOT, "assets", "ui")
 
-FONT = pygame.font.SysFont("Berlin Sans FB Demi", 20)
-BIGFONT = pygame.font.SysFont("arial", 36)
+# (tên, cỡ, đậm, fallback): font chỉ được tạo khi vẽ lần đầu
+FONT = ("Berlin Sans FB Demi", 20, False, None)
+BIGFONT = ("arial", 36, False, None)
 
 
 # -------- BUTTON--------
@@ -50,7 +53,7 @@ class Button:
             pygame.draw.rect(surf, color, self.rect, border_radius=8)
             pygame.draw.rect(surf, (30, 30, 30), self.rect, width=2, border_radius=8)
 
-        label = FONT.render(self.text, True, self.text_color)
+        label = TEXT.render(FONT, self.text, self.text_color)
         surf.blit(label, label.get_rect(center=self.rect.center))
 
     def handle_event(self, event: pygame.event.Event):
@@ -66,7 +69,37 @@ class Button:
 
 # -------- MAIN UI --------
 class GameUI:
+    @staticmethod
+    def load_img(name: str, scale: Optional[Tuple[int, int]] = None) -> Optional[pygame.Surface]:
+        path = os.path.join(ASSET_PATH, name)
+        img = ASSETS.image(path, scale)
+        if img is None:
+            print("[MISSING]", path)
+        return img
+
+    @cached_property
+    def shop_bg(self) -> Optional[pygame.Surface]:
+        return self.load_img("shop.png", self.size)
+
+    @cached_property
+    def coin_icon(self) -> Optional[pygame.Surface]:
+        return self.load_img("coin.png", (50, 50))
+
+    @cached_property
+    def skin_images(self):
+        # ---- LOAD SKIN IMAGES ----
+        images = {}
+        for skin_name in (self.shop.get_all_skins() if self.shop else []):
+            img_path = os.path.join(ASSET_PATH, f"{skin_name}.png")
+            img = ASSETS.image(img_path, (100, 100))
+            if img:
+                images[skin_name] = img
+            else:
+                print(f"[MISSING] Skin image: {img_path}")
+        return images
+
     def __init__(self, shop_client=None, size=(800, 380)):
+        pygame.init()
         self.size = size
         self.screen = pygame.display.set_mode(size)
         pygame.display.set_caption("UI Module")
@@ -75,31 +108,11 @@ class GameUI:
         self.state = "menu"  
         self.shop = shop_client
 
-        def load_img(name: str, scale: Optional[Tuple[int, int]] = None) -> Optional[pygame.Surface]:
-            path = os.path.join(ASSET_PATH, name)
-            if not os.path.exists(path):
-                print("[MISSING]", path)
-                return None
-            img = pygame.image.load(path).convert_alpha()
-            return pygame.transform.scale(img, scale) if scale else img
-
-        self.menu_bg = load_img("menu.jpg", self.size)
-        self.shop_bg = load_img("shop.png", self.size)
-        self.logo = load_img("Logo_game.png", (320, 140))
-        self.btn_img = load_img("button.png", (220, 60))
-        self.btn_hover = load_img("button_hover.png", (220, 60)) or self.btn_img
-        self.coin_icon = load_img("coin.png", (50, 50))
-        # ---- LOAD SKIN IMAGES ----
-        self.skin_images = {}
-
-        for skin_name in (self.shop.get_all_skins() if self.shop else []):
-            img_path = os.path.join(ASSET_PATH, f"{skin_name}.png")
-            if os.path.exists(img_path):
-                self.skin_images[skin_name] = pygame.transform.scale(
-                    pygame.image.load(img_path).convert_alpha(), (100,100)
-                )
-            else:
-                print(f"[MISSING] Skin image: {img_path}")
+        # Ảnh menu nạp ngay; ảnh shop nạp khi mở shop lần đầu
+        self.menu_bg = self.load_img("menu.jpg", self.size)
+        self.logo = self.load_img("Logo_game.png", (320, 140))
+        self.btn_img = self.load_img("button.png", (220, 60))
+        self.btn_hover = self.load_img("button_hover.png", (220, 60)) or self.btn_img
 
         self.buttons: List[Button] = []
         self._create_main_menu()
@@ -171,7 +184,7 @@ class GameUI:
         pygame.draw.rect(self.screen, (40, 44, 50), box, border_radius=10)
         pygame.draw.rect(self.screen, (20, 20, 20), box, width=3, border_radius=10)
 
-        label = BIGFONT.render("PAUSED", True, (245, 245, 245))
+        label = TEXT.render(BIGFONT, "PAUSED", (245, 245, 245))
         self.screen.blit(label, (box.centerx - label.get_width() // 2, box.top + 24))
 
         resume_rect = pygame.Rect(box.left + 40, box.top + 90, box_w - 80, 44)
@@ -192,8 +205,10 @@ class GameUI:
         pygame.draw.rect(self.screen, (28, 28, 36), pygame.Rect(8, 8, 260, 64), border_radius=8)
         coins = self.shop.get_coins() if self.shop else 0
         equipped = self.shop.get_equipped_skin() if self.shop else "None"
-        self.screen.blit(FONT.render(f"Coins: {coins}", True, (240, 240, 180)), (18, 18))
-        self.screen.blit(FONT.render(f"Skin: {equipped}", True, (210, 210, 210)), (18, 40))
+        label = TEXT.render(FONT, "Coins: ", (240, 240, 180))
+        self.screen.blit(label, (18, 18))
+        TEXT.blit_number(self.screen, FONT, coins, (240, 240, 180), topleft=(18 + label.get_width(), 18))
+        self.screen.blit(TEXT.render(FONT, f"Skin: {equipped}", (210, 210, 210)), (18, 40))
         self.pause_button.draw(self.screen)
 
 # -------- DRAW SHOP--------
@@ -220,15 +235,13 @@ class GameUI:
             self.screen.blit(self.coin_icon, (25, 10))  
 
         # text vàng giống style fantasy (vàng sáng + viền nhẹ)
-        coins = str(self.shop.get_coins())
+        coins = self.shop.get_coins()
 
         # Shadow
-        shadow = FONT.render(coins, True, (50, 30, 0))
-        self.screen.blit(shadow, (62, 33))
+        TEXT.blit_number(self.screen, FONT, coins, (50, 30, 0), topleft=(62, 33))
 
         # Glow text vàng
-        coins_text = FONT.render(coins, True, (255, 230, 120))
-        self.screen.blit(coins_text, (60, 30))
+        TEXT.blit_number(self.screen, FONT, coins, (255, 230, 120), topleft=(60, 30))
         skins = self.shop.get_all_skins()
         owned = set(self.shop.get_owned_skins())
         equipped = self.shop.get_equipped_skin()
@@ -257,7 +270,7 @@ class GameUI:
                 img_rect = img.get_rect(center=(rect.centerx, rect.centery-5))
                 self.screen.blit(img, img_rect)
             else:
-                label = FONT.render(skin_id, True, (255, 255, 255))
+                label = TEXT.render(FONT, skin_id, (255, 255, 255))
                 self.screen.blit(label, label.get_rect(center=rect.center))
 
             btn_rect = pygame.Rect(rect.left, rect.bottom+8, box_w, 40)
@@ -342,6 +355,7 @@ class GameUI:
 class DummyShop:
     def __init__(self, save_file: str = "shop_state.json"):
         self.save_file = Path(save_file)
+        self.store = JsonStore(self.save_file, ensure_ascii=False, indent=2)
         self.state = {
             "coins": 1000,
             "owned_skins": ["nhanvat1"],
@@ -351,19 +365,15 @@ class DummyShop:
         self._all_skins = ["nhanvat1", "nhanvat2", "nhanvat3", "nhanvat4"]
 
     def save_state(self):
-        try:
-            with open(self.save_file, "w", encoding="utf-8") as f:
-                json.dump(self.state, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print("[Shop] save error:", e)
+        self.store.mark_dirty(self.state)
+
+    def flush(self):
+        return self.store.flush()
 
     def load_state(self):
-        if self.save_file.exists():
-            try:
-                with open(self.save_file, "r", encoding="utf-8") as f:
-                    self.state = json.load(f)
-            except Exception as e:
-                print("[Shop] load error:", e)
+        data = self.store.load()
+        if data is not None:
+            self.state = data
 
     def get_coins(self):
         return self.state.get("coins", 0)